@@ -1,11 +1,27 @@
-import pandas as pd
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from tkinter import StringVar, END, Listbox, Toplevel, Label, Entry, Button
+from tkinter import StringVar, BooleanVar, END, Listbox, Toplevel, Label, Entry, Button
 from tkinter.scrolledtext import ScrolledText
 import pyperclip
 import webbrowser
 import tkinter as tk
+import queue
+import threading
+import time
+
+from dictionary_engine import DIRECTIONS, DictionaryEngine
+from dictionary_journal import WordJournal
+from dictionary_snapshot import SNAPSHOT_DIR
+from transliteration import Transliterator
+
+ENML_PATH = r"C:/Users/20hsm/OneDrive/Desktop/files/en_ml.xlsx"
+MLML_PATH = r"C:/Users/20hsm/OneDrive/Desktop/datukexcel.xlsx"
+
+# Typing debounce adapts to the measured lookup cost within these bounds (ms)
+MIN_DEBOUNCE_MS = 10
+MAX_DEBOUNCE_MS = 150
+POLL_MS = 15  # how often the mainloop checks for a search in flight
+
 
 class BilingualPredictiveDictionary:
     def __init__(self, root):
@@ -18,23 +34,33 @@ class BilingualPredictiveDictionary:
         self.font_bold = ("Noto Sans Malayalam", 16, "bold")
         self.font_heading = ("Helvetica", 20, "bold")
 
-        # Load data
-        self.enml_data = pd.read_excel(r"C:/Users/20hsm/OneDrive/Desktop/files/en_ml.xlsx")
-        self.mlml_data = pd.read_excel(r"C:/Users/20hsm/OneDrive/Desktop/datukexcel.xlsx")
-
-        self.enml_data.dropna(inplace=True)
-        self.mlml_data.dropna(inplace=True)
-
-        self.enml_pairs = list(zip(self.enml_data['from_content'].astype(str).str.strip(),
-                                   self.enml_data['to_content'].astype(str).str.strip()))
-
-        self.mlml_pairs = list(zip(self.mlml_data['from_content'].astype(str).str.strip(),
-                                   self.mlml_data['to_content'].astype(str).str.strip()))
+        # Load data (cleaned, from the compiled snapshots when they are current)
+        # into the shared search engine; each cursor resumes from the last typed prefix
+        self.engine = DictionaryEngine.load(ENML_PATH, MLML_PATH)
+        # Added words go to a journal first and are folded into the workbooks
+        # in the background
+        self.engine.attach_journal(WordJournal(), {"en_ml": (ENML_PATH, SNAPSHOT_DIR, True),
+                                                   "ml_ml": (MLML_PATH, SNAPSHOT_DIR, True)})
+        self.engine.compact_in_background()
+        self.cursors = {direction: self.engine.cursor(direction) for direction in DIRECTIONS}
+        self.transliterator = Transliterator(self.engine)
 
         self.search_var = StringVar()
         self.direction = StringVar(value="en-ml")
+        # Manglish mode: romanized input ("vellam") searches Malayalam headwords
+        self.manglish = BooleanVar(value=False)
         self.search_job = None
 
+        # Searches run on a worker thread; every request carries a generation
+        # number and results older than the latest request are dropped. The
+        # mainloop polls for results only while a search is in flight.
+        self.search_generation = 0
+        self.poll_job = None
+        self.lookup_cost = 0.0  # moving average of one search, in seconds
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        threading.Thread(target=self.search_worker, daemon=True).start()
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -63,6 +89,7 @@ class BilingualPredictiveDictionary:
         ttkb.Radiobutton(dir_frame, text="🇬🇧 English → മലയാളം", variable=self.direction, value="en-ml", command=self.perform_search, bootstyle="info").pack(side=LEFT, padx=10)
         ttkb.Radiobutton(dir_frame, text="🇮🇳 മലയാളം → English", variable=self.direction, value="ml-en", command=self.perform_search, bootstyle="info").pack(side=LEFT, padx=10)
         ttkb.Radiobutton(dir_frame, text="🗣️ മലയാളം → മലയാളം", variable=self.direction, value="ml-ml", command=self.perform_search, bootstyle="info").pack(side=LEFT, padx=10)
+        ttkb.Checkbutton(dir_frame, text="🔤 Manglish (vellam → വെള്ളം)", variable=self.manglish, command=self.perform_search, bootstyle="info-round-toggle").pack(side=LEFT, padx=10)
 
         ttkb.Button(self.root, text="➕ Add Word to Dictionary", bootstyle="warning", command=self.add_word).pack(pady=5)
         ttkb.Button(self.root, text="📬 Contact Me", bootstyle="secondary", command=self.open_contact_window).pack(pady=5)
@@ -81,40 +108,92 @@ class BilingualPredictiveDictionary:
     def delayed_search(self, event=None):
         if self.search_job:
             self.root.after_cancel(self.search_job)
-        self.search_job = self.root.after(150, self.perform_search)
+        # Fast lookups barely wait; slow ones wait long enough to skip keystrokes
+        delay = int(min(MAX_DEBOUNCE_MS, max(MIN_DEBOUNCE_MS, 3000 * self.lookup_cost)))
+        self.search_job = self.root.after(delay, self.perform_search)
+
+    def perform_search(self, text=None, refresh_suggestions=True):
+        """Queue a search for the worker; the newest request wins."""
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        self.search_generation += 1
+        if text is None:
+            text = self.search_var.get()
+        self.requests.put(("search", self.search_generation, self.direction.get(), text,
+                           refresh_suggestions, self.manglish.get()))
+        if self.poll_job is None:
+            self.poll_job = self.root.after(POLL_MS, self.poll_results)
+
+    def search_worker(self):
+        """Runs searches and word additions off the mainloop, in request order."""
+        while True:
+            tasks = [self.requests.get()]
+            try:
+                while True:
+                    tasks.append(self.requests.get_nowait())
+            except queue.Empty:
+                pass
+            for task in tasks:
+                if task[0] == "add":
+                    self.save_entry(*task[1:])
+            # Only the newest of several queued searches is worth running
+            searches = [task for task in tasks if task[0] == "search"]
+            if not searches:
+                continue
+            _, generation, direction, text, refresh_suggestions, manglish = searches[-1]
+            if generation != self.search_generation:
+                continue
+            start = time.perf_counter()
+            try:
+                result = self.run_search(direction, text, refresh_suggestions, manglish)
+            except Exception as e:
+                # A failed search must not stop the worker (or the polling)
+                print(f"Warning: Search failed: {e}")
+                result = (None, None, ())
+            self.lookup_cost = 0.8 * self.lookup_cost + 0.2 * (time.perf_counter() - start)
+            self.results.put((generation, *result))
+
+    def run_search(self, direction, text, refresh_suggestions, manglish):
+        """Worker side of perform_search: (suggestions, src_word, translations)."""
+        if manglish and direction != "en-ml" and text.strip().isascii():
+            # Malayalam headwords spelled by the romanized text; the best one is shown
+            suggestions = self.transliterator.transliterate(direction, text)
+            src_word, translations = (self.engine.define(direction, suggestions[0])
+                                      if suggestions else (None, ()))
+            return (suggestions if refresh_suggestions else None), src_word, translations
+        suggestions = (self.engine.suggest(direction, text, cursor=self.cursors[direction])
+                       if refresh_suggestions else None)
+        return (suggestions, *self.engine.define(direction, text))
+
+    def poll_results(self):
+        """Show the newest search result; keeps polling until the latest request is answered."""
+        latest = None
+        try:
+            while True:
+                latest = self.results.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not None and latest[0] == self.search_generation:
+            self.poll_job = None
+            self.show_results(*latest[1:])
+        else:
+            self.poll_job = self.root.after(POLL_MS, self.poll_results)
 
-    def perform_search(self):
-        word = self.search_var.get().strip().lower()
-        self.suggestion_box.delete(0, END)
+    def show_results(self, suggestions, src_word, translations):
         self.output_box.config(state="normal")
         self.output_box.delete("1.0", END)
 
-        if not word:
-            return
-
-        if self.direction.get() == "en-ml":
-            matches = [(src, tgt) for src, tgt in self.enml_pairs if src.lower().startswith(word)]
-            exacts = [(src, tgt) for src, tgt in self.enml_pairs if src.lower() == word]
-        elif self.direction.get() == "ml-en":
-            matches = [(tgt, src) for src, tgt in self.enml_pairs if tgt.lower().startswith(word)]
-            exacts = [(tgt, src) for src, tgt in self.enml_pairs if tgt.lower() == word]
-        else:
-            matches = [(src, tgt) for src, tgt in self.mlml_pairs if src.lower().startswith(word)]
-            exacts = [(src, tgt) for src, tgt in self.mlml_pairs if src.lower() == word]
-
-        for suggestion in list(dict.fromkeys([src for src, _ in matches]))[:20]:
-            self.suggestion_box.insert(END, suggestion)
+        if suggestions is not None:
+            self.suggestion_box.delete(0, END)
+            for suggestion in suggestions:
+                self.suggestion_box.insert(END, suggestion)
 
-        if exacts:
-            src_word = exacts[0][0]
+        if src_word is not None:
             self.output_box.insert(END, src_word + "\n", "bold")
-
-            added_translations = set()
-            for _, tgt in exacts:
-                if tgt not in added_translations:
-                    self.output_box.insert(END, f"→ {tgt} 🗍\n", "copy")
-                    self.output_box.tag_add(tgt, "end-2l", "end-1l")
-                    added_translations.add(tgt)
+            for tgt in translations:
+                self.output_box.insert(END, f"→ {tgt} 🗍\n", "copy")
+                self.output_box.tag_add(tgt, "end-2l", "end-1l")
 
         self.output_box.config(state="disabled")
 
@@ -138,18 +217,20 @@ class BilingualPredictiveDictionary:
             to_word = to_entry.get().strip()
             if not from_word or not to_word:
                 return
-            self.enml_pairs.append((from_word, to_word))
-            new_row = pd.DataFrame([[from_word, to_word]], columns=['from_content', 'to_content'])
-            self.enml_data = pd.concat([self.enml_data, new_row], ignore_index=True)
-            try:
-                self.enml_data.to_excel(r"C:/Users/20hsm/OneDrive/Desktop/files/en_ml.xlsx", index=False)
-            except:
-                print("Warning: Could not save to Excel.")
+            # The worker owns the engine, so the word is added between searches
+            self.requests.put(("add", from_word, to_word))
             popup.destroy()
             self.perform_search()
 
         Button(popup, text="Save Word", command=save, font=self.font_normal).pack(pady=15)
 
+    def save_entry(self, from_word, to_word):
+        """Worker side of add_word: journal and index the pair."""
+        try:
+            self.engine.add_entry("en-ml", from_word, to_word)
+        except OSError as e:
+            print(f"Warning: Could not save the word: {e}")
+
     def on_suggestion_click(self, event):
         index = self.suggestion_box.curselection()
         if not index:
@@ -158,26 +239,8 @@ class BilingualPredictiveDictionary:
         self.search_var.set(selected_word)
         self.entry.icursor(END)
 
-        self.output_box.config(state="normal")
-        self.output_box.delete("1.0", END)
-
-        if self.direction.get() == "en-ml":
-            results = [(src, tgt) for src, tgt in self.enml_pairs if src == selected_word]
-        elif self.direction.get() == "ml-en":
-            results = [(tgt, src) for src, tgt in self.enml_pairs if tgt == selected_word]
-        else:
-            results = [(src, tgt) for src, tgt in self.mlml_pairs if src == selected_word]
-
-        if results:
-            self.output_box.insert(END, f"{selected_word}\n", "bold")
-            added = set()
-            for _, tgt in results:
-                if tgt not in added:
-                    self.output_box.insert(END, f"→ {tgt} 🗍\n", "copy")
-                    self.output_box.tag_add(tgt, "end-2l", "end-1l")
-                    added.add(tgt)
-
-        self.output_box.config(state="disabled")
+        # Keep the suggestion list so the user can pick another entry
+        self.perform_search(selected_word, refresh_suggestions=False)
 
     def on_copy_click(self, event):
         index = self.output_box.index(f"@{event.x},{event.y}")
@@ -0,0 +1,233 @@
+"""Translate a whole word list, text file or CSV file in one pass.
+
+The input is read as a stream (text in blocks, CSV in row chunks), split
+into words, deduplicated, and looked up in batches; every distinct word is
+written out once, as soon as its batch is done, as CSV or JSON Lines. Memory
+stays bounded however large the input: only the current block, the pending
+batch and the set of words already written are held, and that set is reset
+once it reaches ``max_seen`` words (a word seen again after a reset is simply
+written again).
+
+    python batch_translate.py notes.txt -o notes.csv
+    python batch_translate.py words.csv --column word --lines -o words.jsonl
+    python batch_translate.py big.txt --direction ml-ml --sqlite .cache_data/dictionary.sqlite
+
+Words are split the way Malayalam is written: a Malayalam word runs over its
+vowel signs, virama, chillus and ZWJ/ZWNJ, so ``ക്ഷേത്രം`` or ``അവന്‍`` stay
+whole; English words keep inner apostrophes and hyphens. Numbers and
+punctuation are dropped. With ``--lines`` every line (or CSV cell) is one
+term instead, for word lists holding multi-word headwords.
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+
+import pandas as pd
+
+from dictionary_engine import DIRECTIONS, DictionaryEngine
+from dictionary_snapshot import SNAPSHOT_DIR
+
+BATCH_SIZE = 2000            # distinct words looked up per batch
+BLOCK_SIZE = 1 << 20         # characters of text read at a time
+CSV_CHUNK_ROWS = 50_000
+MAX_SEEN = 1_000_000         # distinct words remembered for deduplication
+TRANSLATION_SEPARATOR = " | "  # joins translations in CSV output
+
+ENML_PATH = SNAPSHOT_DIR / "en_ml.xlsx"
+MLML_PATH = SNAPSHOT_DIR / "datukexcel.xlsx"
+
+# Malayalam letters and signs (not digits or fractions) with ZWNJ/ZWJ, or an
+# English word with inner apostrophes/hyphens
+_WORD = re.compile("[\u0d00-\u0d65\u0d7a-\u0d7f\u200c\u200d]+"
+                   "|[A-Za-z]+(?:['\u2019-][A-Za-z]+)*")
+_MALAYALAM = re.compile("[\u0d00-\u0d7f]")
+_JOINERS = "\u200c\u200d"
+
+OUTPUT_COLUMNS = ("term", "direction", "headword", "translations")
+
+
+def tokenize(text):
+    """Words of ``text``, in order."""
+    for word in _WORD.findall(text):
+        if word[0] in _JOINERS:
+            # A trailing ZWJ may be part of an old-style chillu (ന്‍), so only
+            # leading joiners are dropped
+            word = word.lstrip(_JOINERS)
+            if not word.strip(_JOINERS):
+                continue
+        yield word
+
+
+def detect_direction(term):
+    """"ml-en" for Malayalam terms, "en-ml" for everything else."""
+    return "ml-en" if _MALAYALAM.search(term) else "en-ml"
+
+
+def _text_blocks(f, block_size=BLOCK_SIZE):
+    """Blocks of a text stream, cut at whitespace so no word is split."""
+    carry = ""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        block = carry + block
+        cut = max(block.rfind(" "), block.rfind("\n"), block.rfind("\t"))
+        if cut < 0:
+            if len(block) < 4 * block_size:
+                carry = block  # no whitespace yet; keep reading
+                continue
+            cut = len(block) - 1  # no whitespace at all: cut anyway
+        carry = block[cut + 1:]
+        yield block[:cut + 1]
+    if carry:
+        yield carry
+
+
+def read_terms(f, kind="text", lines=False, column=None):
+    """
+    Terms of a text stream ``f``.
+    kind: "text" (plain text or a word list) or "csv" (all columns, or ``column``)
+    lines: each line / cell is one term instead of being split into words
+    """
+    if kind == "csv":
+        chunks = pd.read_csv(f, chunksize=CSV_CHUNK_ROWS, dtype=str, keep_default_na=False,
+                             usecols=[column] if column else None)
+        for chunk in chunks:
+            for values in chunk.itertuples(index=False, name=None):
+                for value in values:
+                    if lines:
+                        if value.strip():
+                            yield value.strip()
+                    else:
+                        yield from tokenize(value)
+    elif lines:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+    else:
+        for block in _text_blocks(f):
+            yield from tokenize(block)
+
+
+def translate_terms(engine, terms, direction="auto", batch_size=BATCH_SIZE,
+                    max_seen=MAX_SEEN):
+    """
+    Look up every distinct term once, in batches.
+    direction: one of DIRECTIONS, or "auto" to pick it per term
+    Yields: {"term", "direction", "headword" (None if not found), "translations"}
+    in order of first appearance
+    """
+    if direction != "auto" and direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction}")
+    seen_terms = set()  # exact strings, checked before normalizing
+    seen = set()        # (direction, normalized key)
+    pending = []        # (direction, term) in input order
+
+    def flush():
+        # One define_many() per direction, then the rows in input order
+        by_direction = {}
+        for term_direction, term in pending:
+            by_direction.setdefault(term_direction, []).append(term)
+        answers = {term_direction: iter(engine.define_many(term_direction, batch))
+                   for term_direction, batch in by_direction.items()}
+        for term_direction, term in pending:
+            headword, translations = next(answers[term_direction])
+            yield {"term": term, "direction": term_direction,
+                   "headword": headword, "translations": list(translations)}
+        pending.clear()
+
+    for term in terms:
+        if term in seen_terms:
+            continue
+        if len(seen_terms) >= max_seen:
+            seen_terms.clear()
+            seen.clear()
+        seen_terms.add(term)
+        term_direction = detect_direction(term) if direction == "auto" else direction
+        # Spellings that normalize alike (case, chillu forms) are one lookup
+        key = (term_direction, engine.indexes[term_direction].normalize(term))
+        if key in seen:
+            continue
+        seen.add(key)
+        pending.append((term_direction, term))
+        if len(pending) == batch_size:
+            yield from flush()
+    yield from flush()
+
+
+def write_rows(rows, out, fmt="csv"):
+    """
+    Stream result rows to the text stream ``out`` as "csv" or "jsonl".
+    Returns: (rows written, rows with a headword)
+    """
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown output format: {fmt}")
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_COLUMNS)
+    written = found = 0
+    for row in rows:
+        if fmt == "csv":
+            writer.writerow((row["term"], row["direction"], row["headword"] or "",
+                             TRANSLATION_SEPARATOR.join(row["translations"])))
+        else:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        written += 1
+        found += row["headword"] is not None
+    out.flush()
+    return written, found
+
+
+def translate_file(engine, source, out, kind="text", fmt="csv", direction="auto",
+                   lines=False, column=None, batch_size=BATCH_SIZE):
+    """
+    Translate a text or binary stream ``source`` into the text stream ``out``.
+    Binary input is decoded as UTF-8 (a BOM is skipped, bad bytes replaced).
+    Returns: (distinct terms written, terms found)
+    """
+    if not isinstance(source, io.TextIOBase):
+        source = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline="")
+    terms = read_terms(source, kind, lines, column)
+    return write_rows(translate_terms(engine, terms, direction, batch_size), out, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate a word list, text or CSV file")
+    parser.add_argument("input", help="input file (.csv, or any text file); - for stdin")
+    parser.add_argument("-o", "--output", help="output file (.csv or .jsonl); default stdout")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="output format (default: from the output name, else csv)")
+    parser.add_argument("--direction", choices=("auto",) + DIRECTIONS, default="auto",
+                        help="lookup direction (auto: ml-en for Malayalam words, else en-ml)")
+    parser.add_argument("--lines", action="store_true",
+                        help="treat each line / CSV cell as one term instead of splitting words")
+    parser.add_argument("--column", help="CSV column to read (default: all columns)")
+    parser.add_argument("--csv", action="store_true", help="read the input as CSV")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--enml", default=str(ENML_PATH), help="English-Malayalam workbook")
+    parser.add_argument("--mlml", default=str(MLML_PATH), help="Malayalam-Malayalam workbook")
+    parser.add_argument("--sqlite", help="use a compiled dictionary database instead")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = DictionaryEngine.open_sqlite(args.sqlite)
+    else:
+        engine = DictionaryEngine.load(args.enml, args.mlml)
+
+    kind = "csv" if args.csv or args.input.lower().endswith(".csv") else "text"
+    fmt = args.format or ("jsonl" if (args.output or "").lower().endswith((".jsonl", ".json"))
+                          else "csv")
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    out = (open(args.output, "w", encoding="utf-8", newline="") if args.output
+           else io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline=""))
+    with source, out:
+        written, found = translate_file(engine, source, out, kind, fmt, args.direction,
+                                        args.lines, args.column, args.batch_size)
+    print(f"{written:,} distinct terms, {found:,} found", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
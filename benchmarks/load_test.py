@@ -0,0 +1,185 @@
+"""Local load test for dictionary_server.
+
+Starts the server on a synthetic corpus with 1..N workers (or targets a
+running server with --url), drives it from concurrent keep-alive clients in
+separate processes, and reports throughput and latency for single lookups
+and for /batch calls, plus the memory each worker holds privately.
+
+    python benchmarks/load_test.py --rows 100000 --workers 1 4 --clients 8
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 --clients 16
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from run_benchmarks import MAX_SUGGESTION_CHIPS, query_mixes, summarize  # noqa: E402
+from synthetic_corpus import generate_sheet  # noqa: E402
+
+DURATION_S = 10
+BATCH_SIZE = 100
+
+
+def _client(url, queries, mode, duration, results):
+    """One client process: send requests back to back over one connection."""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    samples, answered, errors = [], 0, 0
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        if mode == "batch":
+            chunk = [queries[(i + k) % len(queries)] for k in range(BATCH_SIZE)]
+            body = json.dumps({"requests": [{"op": "define", "q": query, "direction": direction}
+                                            for direction, query in chunk]})
+            request = ("POST", "/batch", body, {"Content-Type": "application/json"})
+            count = BATCH_SIZE
+        else:
+            direction, query = queries[i % len(queries)]
+            params = urlencode({"q": query, "direction": direction,
+                                "limit": MAX_SUGGESTION_CHIPS})
+            request = ("GET", f"/lookup?{params}", None, {})
+            count = 1
+        i += count
+        start = time.perf_counter()
+        try:
+            conn.request(request[0], request[1], body=request[2], headers=request[3])
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+            continue
+        samples.append(time.perf_counter() - start)
+        answered += count
+    conn.close()
+    results.put((samples, answered, errors))
+
+
+def drive(url, queries, mode, clients, duration):
+    """Run ``clients`` client processes for ``duration`` seconds and summarize."""
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_client,
+                                     args=(url, queries[c::clients] or queries, mode,
+                                           duration, results))
+             for c in range(clients)]
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+    collected = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - start
+    for proc in procs:
+        proc.join()
+    samples = [sample for client, _, _ in collected for sample in client]
+    answered = sum(answered for _, answered, _ in collected)
+    report = {"clients": clients, "requests_per_s": round(len(samples) / elapsed, 1),
+              "lookups_per_s": round(answered / elapsed, 1),
+              "errors": sum(errors for _, _, errors in collected)}
+    report.update(summarize(samples))
+    return report
+
+
+def get_json(url, path):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    try:
+        conn.request("GET", path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def worker_memory(url, workers):
+    """/health of as many distinct workers as answer within a few tries."""
+    seen = {}
+    for _ in range(workers * 20):
+        health = get_json(url, "/health")
+        seen[health["worker"]] = health["memory_mb"]
+        if len(seen) == workers:
+            break
+    return seen
+
+
+def start_server(engine, workers):
+    """Fork a server process on a free port; returns (process, url)."""
+    import dictionary_server
+
+    ready = multiprocessing.Queue()
+    proc = multiprocessing.Process(
+        target=dictionary_server.serve, args=(engine, "127.0.0.1", 0, workers),
+        kwargs={"ready": ready.put}, daemon=False)
+    proc.start()
+    host, port = ready.get(timeout=600)
+    url = f"http://{host}:{port}"
+    for _ in range(100):
+        try:
+            get_json(url, "/health")
+            break
+        except OSError:
+            time.sleep(0.1)
+    return proc, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for dictionary_server")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic corpus size")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--clients", type=int, default=2 * (os.cpu_count() or 1))
+    parser.add_argument("--duration", type=float, default=DURATION_S, help="seconds per run")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+    multiprocessing.set_start_method("fork")
+
+    enml, mlml = generate_sheet("en_ml", args.rows), generate_sheet("ml_ml", args.rows)
+    queries = [query for mix in query_mixes(enml, mlml, per_mix=500).values() for query in mix]
+    report = {"rows": args.rows, "cpus": os.cpu_count(), "runs": {}}
+
+    if args.url:
+        targets = [(None, args.url, None)]
+    else:
+        from dictionary_engine import DictionaryEngine
+        engine = DictionaryEngine(enml, mlml)
+        targets = [(workers, None, engine) for workers in dict.fromkeys(args.workers)]
+    for workers, url, engine in targets:
+        proc = None
+        if url is None:
+            proc, url = start_server(engine, workers)
+        try:
+            name = f"{workers} worker(s)" if workers else url
+            print(f"{name}...", flush=True)
+            run = {mode: drive(url, queries, mode, args.clients, args.duration)
+                   for mode in ("lookup", "batch")}
+            if workers:
+                run["worker_memory_mb"] = worker_memory(url, workers)
+            report["runs"][name] = run
+            for mode in ("lookup", "batch"):
+                stats = run[mode]
+                print(f"  {mode:<7} {stats['lookups_per_s']:>10,.0f} lookups/s  "
+                      f"p50 {stats.get('p50_ms', 0):>7.2f} ms  p99 {stats.get('p99_ms', 0):>7.2f} ms"
+                      f"  errors {stats['errors']}")
+            if workers:
+                print(f"  memory  {run['worker_memory_mb']}")
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.join()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Startup and lookup benchmarks for both front ends.
+
+For each corpus size this measures cold-start time (a fresh interpreter
+loading the compiled snapshots and building the indexes), index build time,
+resident memory, and per-query latency (p50/p95/p99) of the dictionary
+engine as each front end calls it (Streamlit: one ``lookup`` per search;
+Tkinter: ``suggest`` + ``define`` per keystroke) over several query mixes,
+for the in-memory indexes and for the SQLite backend. Results are written
+as JSON so runs can be compared across commits.
+
+    python benchmarks/run_benchmarks.py                        # 10k, 100k, 1M rows
+    python benchmarks/run_benchmarks.py --sizes 10000 --xlsx   # also time openpyxl
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+from synthetic_corpus import ML_CONSONANTS, SIZES, generate_sheet  # noqa: E402
+
+RESULTS_DIR = BENCH_DIR / "results"
+QUERIES_PER_MIX = 200
+MAX_SUGGESTION_CHIPS = 15  # streamlitver.MAX_SUGGESTION_CHIPS
+
+
+# --- Measurement helpers ---
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(samples):
+    """p50/p95/p99/mean in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 4)
+
+    return {"n": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# --- Workload ---
+
+def build_engine(enml, mlml):
+    from dictionary_engine import DictionaryEngine
+    return DictionaryEngine(enml, mlml)
+
+
+def _typo(rng, word):
+    chars = list(word)
+    chars[rng.randrange(len(chars))] = rng.choice("xqzജഞ")
+    return "".join(chars)
+
+
+def query_mixes(enml, mlml, seed=0, per_mix=QUERIES_PER_MIX):
+    """Replayable query mixes as {mix: [(direction, query), ...]}."""
+    rng = random.Random(seed)
+    english = enml["from_content"].sample(per_mix, replace=True, random_state=seed).tolist()
+    malayalam = mlml["from_content"].sample(per_mix, replace=True, random_state=seed).tolist()
+    targets = enml["to_content"].sample(per_mix, replace=True, random_state=seed).tolist()
+    return {
+        "single_letter": [("en-ml", rng.choice("abcdefghiklmnoprstuvw")) if i % 2 else
+                          (rng.choice(("ml-en", "ml-ml")), rng.choice(ML_CONSONANTS))
+                          for i in range(per_mix)],
+        "full_word": [("en-ml", word) for word in english],
+        "malayalam": [("ml-ml", word) if i % 2 else ("ml-en", target)
+                      for i, (word, target) in enumerate(zip(malayalam, targets))],
+        "miss": [("en-ml", _typo(rng, word)) if i % 2 else ("ml-ml", _typo(rng, ml_word))
+                 for i, (word, ml_word) in enumerate(zip(english, malayalam))],
+    }
+
+
+def bench_streamlit(engine, mixes):
+    """Latency of a Streamlit search: one lookup plus the related-word count."""
+    report = {}
+    for mix, queries in mixes.items():
+        samples = []
+        for direction, query in queries:
+            start = time.perf_counter()
+            results = engine.lookup(direction, query, limit=MAX_SUGGESTION_CHIPS)
+            results.related_count  # rendered in the results header
+            samples.append(time.perf_counter() - start)
+        report[mix] = summarize(samples)
+    return report
+
+
+def bench_tkinter(engine, mixes):
+    """Per-keystroke latency of the Tkinter search, typing each query out."""
+    from dictionary_engine import DIRECTIONS
+
+    cursors = {direction: engine.cursor(direction) for direction in DIRECTIONS}
+    report = {}
+    for mix, queries in mixes.items():
+        samples = []
+        for direction, query in queries:
+            for end in range(1, len(query) + 1):
+                start = time.perf_counter()
+                engine.suggest(direction, query[:end], cursor=cursors[direction])
+                engine.define(direction, query[:end])
+                samples.append(time.perf_counter() - start)
+        report[mix] = summarize(samples)
+    return report
+
+
+def cold_start_child(work_dir):
+    """Runs in a fresh interpreter: time snapshot loads and index builds."""
+    from dictionary_snapshot import load_sheet
+
+    start = time.perf_counter()
+    work_dir = Path(work_dir)
+    enml = load_sheet(work_dir / "en_ml.csv", snapshot_dir=work_dir)
+    mlml = load_sheet(work_dir / "datukexcel.csv", snapshot_dir=work_dir)
+    loaded = time.perf_counter()
+    build_engine(enml, mlml)
+    built = time.perf_counter()
+    print(json.dumps({"snapshot_load_s": loaded - start, "index_build_s": built - loaded,
+                      "rss_mb": rss_mb()}))
+
+
+def bench_size(rows, with_xlsx, per_mix):
+    from dictionary_snapshot import read_sheet, write_snapshot
+
+    result = {"rows": rows}
+    start = time.perf_counter()
+    enml = generate_sheet("en_ml", rows)
+    mlml = generate_sheet("ml_ml", rows)
+    result["generate_s"] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        if with_xlsx:
+            xlsx_path = work_dir / "en_ml.xlsx"
+            enml.to_excel(xlsx_path, index=False)
+            start = time.perf_counter()
+            read_sheet(xlsx_path)
+            result["xlsx_parse_s"] = time.perf_counter() - start
+
+        # CSV files stand in as snapshot sources; the child only sees a current snapshot
+        for df, name in ((enml, "en_ml"), (mlml, "datukexcel")):
+            source = work_dir / f"{name}.csv"
+            df.to_csv(source, index=False)
+            write_snapshot(df, work_dir / f"{name}.mldict", source)
+
+        # Whole process wall time: interpreter start, imports, loads and builds
+        start = time.perf_counter()
+        child = subprocess.run([sys.executable, __file__, "--cold-start-child", str(work_dir)],
+                               capture_output=True, text=True, check=True)
+        result["cold_start"] = json.loads(child.stdout.strip().splitlines()[-1])
+        result["cold_start"]["total_s"] = time.perf_counter() - start
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    engine = build_engine(enml, mlml)
+    result["index_build_s"] = time.perf_counter() - start
+    result["index_rss_mb"] = rss_mb() - rss_before
+
+    fuzzy = {}
+    for direction, index in engine.indexes.items():
+        start = time.perf_counter()
+        index.prepare_fuzzy()
+        fuzzy[direction] = time.perf_counter() - start
+    result["fuzzy_build_s"] = fuzzy
+    result["fuzzy_rss_mb"] = rss_mb() - rss_before - result["index_rss_mb"]
+
+    mixes = query_mixes(enml, mlml, per_mix=per_mix)
+    result["latency"] = {}
+    for name, bench in (("streamlit", bench_streamlit), ("tkinter", bench_tkinter)):
+        result["latency"][name] = bench(engine, mixes)
+    result["rss_mb"] = rss_mb()
+    result["sqlite"] = bench_sqlite(enml, mlml, mixes)
+    return result
+
+
+def bench_sqlite(enml, mlml, mixes):
+    """Build, open and lookup costs of the SQLite backend for the same corpus."""
+    from dictionary_engine import DictionaryEngine
+    from dictionary_sqlite import DATABASE_NAME, build_database
+
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / DATABASE_NAME
+        start = time.perf_counter()
+        build_database(enml, mlml, db_path)
+        result["build_s"] = time.perf_counter() - start
+        result["file_mb"] = db_path.stat().st_size / 2**20
+
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        engine = DictionaryEngine.open_sqlite(db_path)
+        result["open_s"] = time.perf_counter() - start
+        result["latency"] = {}
+        for name, bench in (("streamlit", bench_streamlit), ("tkinter", bench_tkinter)):
+            result["latency"][name] = bench(engine, mixes)
+        result["rss_growth_mb"] = rss_mb() - rss_before
+    return result
+
+
+# --- Reporting ---
+
+def compare(old, new):
+    """Print latency and startup ratios between two result files (new / old)."""
+    for size, current in new["sizes"].items():
+        previous = old["sizes"].get(size)
+        if not previous:
+            continue
+        print(f"\n{size} rows ({old['commit']} -> {new['commit']})")
+        for key in ("index_build_s",):
+            print(f"  {key:<28} {previous[key]:>9.3f} -> {current[key]:>9.3f}")
+        print(f"  {'cold_start total_s':<28} {previous['cold_start']['total_s']:>9.3f} -> "
+              f"{current['cold_start']['total_s']:>9.3f}")
+        latencies = dict(current["latency"])
+        if "sqlite" in current and "sqlite" in previous:
+            latencies.update({f"sqlite {name}": mixes
+                              for name, mixes in current["sqlite"]["latency"].items()})
+            previous = dict(previous, latency=dict(
+                previous["latency"], **{f"sqlite {name}": mixes
+                                        for name, mixes in previous["sqlite"]["latency"].items()}))
+        for front_end, mixes in latencies.items():
+            for mix, stats in mixes.items():
+                before = previous["latency"].get(front_end, {}).get(mix)
+                if not isinstance(stats, dict) or not before or "p99_ms" not in before:
+                    continue
+                print(f"  {front_end + ' ' + mix:<28} p50 {before['p50_ms']:>8.3f} -> "
+                      f"{stats['p50_ms']:>8.3f}   p99 {before['p99_ms']:>8.3f} -> {stats['p99_ms']:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dictionary startup/lookup benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--queries", type=int, default=QUERIES_PER_MIX,
+                        help="queries per mix")
+    parser.add_argument("--xlsx", action="store_true",
+                        help="also time openpyxl parsing of a generated workbook (slow)")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--cold-start-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        cold_start_child(args.cold_start_child)
+        return
+
+    report = {"commit": git_commit(), "created": datetime.now().isoformat(),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "sizes": {}}
+    for rows in args.sizes:
+        print(f"Benchmarking {rows:,} rows...", flush=True)
+        report["sizes"][str(rows)] = bench_size(rows, args.xlsx, args.queries)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Synthetic dictionary sheets for benchmarking.
+
+Generates en_ml-style (English -> Malayalam) and datuk-style (Malayalam ->
+Malayalam) sheets with the same 'from_content' / 'to_content' columns as the
+real workbooks. Words are built from syllables so prefixes share realistic
+branching, Malayalam words use vowel signs, conjuncts and chillus, and
+headwords repeat with a Zipf-like skew so some entries have many senses.
+
+    python benchmarks/synthetic_corpus.py --rows 100000 --out corpus/
+"""
+import argparse
+import random
+from pathlib import Path
+
+import pandas as pd
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+EN_ONSETS = ["", "b", "c", "d", "f", "g", "h", "k", "l", "m", "n", "p", "r", "s", "t",
+             "v", "w", "br", "ch", "cl", "cr", "dr", "fl", "gr", "pl", "pr", "sh", "st", "th", "tr"]
+EN_VOWELS = ["a", "e", "i", "o", "u", "ai", "ea", "ee", "oo", "ou"]
+EN_CODAS = ["", "", "n", "r", "s", "t", "l", "m", "ck", "ng", "nd", "st"]
+
+ML_CONSONANTS = list("കഖഗഘങചഛജഝഞടഠഡഢണതഥദധനപഫബഭമയരലവശഷസഹളഴറ")
+ML_VOWELS = list("അആഇഈഉഊഎഏഐഒഓ")
+ML_SIGNS = ["", "", "ാ", "ി", "ീ", "ു", "ൂ", "െ", "േ", "ൈ", "ൊ", "ോ", "ൗ"]
+ML_CHILLUS = ["ൻ", "ർ", "ൽ", "ൾ", "ൺ"]
+ML_ENDINGS = ["ം", "ം", "ക", "ം", "ു", "ി"]
+
+
+def english_word(rng):
+    return "".join(rng.choice(EN_ONSETS) + rng.choice(EN_VOWELS) + rng.choice(EN_CODAS)
+                   for _ in range(rng.choice((1, 2, 2, 3))))
+
+
+def malayalam_word(rng):
+    parts = [rng.choice(ML_VOWELS)] if rng.random() < 0.2 else []
+    for _ in range(rng.choice((1, 2, 2, 3, 3, 4))):
+        consonant = rng.choice(ML_CONSONANTS)
+        if rng.random() < 0.15:
+            # Conjunct: consonant + virama + consonant
+            consonant += "്" + rng.choice(ML_CONSONANTS)
+        parts.append(consonant + rng.choice(ML_SIGNS))
+    roll = rng.random()
+    if roll < 0.25:
+        parts.append(rng.choice(ML_CHILLUS))
+    elif roll < 0.5:
+        parts.append(rng.choice(ML_ENDINGS))
+    return "".join(parts)
+
+
+def malayalam_phrase(rng):
+    return " ".join(malayalam_word(rng) for _ in range(rng.choice((1, 1, 2, 3))))
+
+
+def _headwords(rng, make_word, rows):
+    """``rows`` headwords drawn with repeats from a vocabulary ~half as large."""
+    vocabulary = list(dict.fromkeys(make_word(rng) for _ in range(max(rows // 2, 1))))
+    weights = [1.0 / (rank + 1) ** 0.6 for rank in range(len(vocabulary))]
+    return rng.choices(vocabulary, weights=weights, k=rows)
+
+
+def generate_sheet(kind, rows, seed=0):
+    """
+    Build one synthetic sheet.
+    kind: "en_ml" (English -> Malayalam) or "ml_ml" (Malayalam -> Malayalam)
+    """
+    rng = random.Random(f"{kind}:{rows}:{seed}")
+    if kind == "en_ml":
+        sources = _headwords(rng, english_word, rows)
+        targets = [malayalam_phrase(rng) for _ in range(rows)]
+    elif kind == "ml_ml":
+        sources = _headwords(rng, malayalam_word, rows)
+        targets = [malayalam_phrase(rng) for _ in range(rows)]
+    else:
+        raise ValueError(f"Unknown sheet kind: {kind}")
+    return pd.DataFrame({"from_content": sources, "to_content": targets})
+
+
+def write_corpus(rows, out_dir, seed=0):
+    """Write en_ml.xlsx and datukexcel.xlsx of ``rows`` rows each into ``out_dir``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for kind, name in (("en_ml", "en_ml.xlsx"), ("ml_ml", "datukexcel.xlsx")):
+        path = out_dir / name
+        generate_sheet(kind, rows, seed).to_excel(path, index=False)
+        paths[kind] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=SIZES[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="corpus")
+    args = parser.parse_args()
+    for kind, path in write_corpus(args.rows, args.out, args.seed).items():
+        print(f"{kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Shared lookup façade: request coalescing plus a bounded result cache.
+
+Many sessions type the same short prefixes ("a", "ക", "th") at the same
+time. CoalescingLookup sits in front of a DictionaryEngine and makes each
+distinct (operation, direction, normalized query, limit) cost one
+computation:
+
+* identical requests that arrive while one is being computed wait for that
+  computation and all receive its result (coalescing);
+* finished results are kept in an LRU cache bounded by ``max_entries`` and
+  expiring after ``ttl`` seconds;
+* the cache empties itself as soon as the engine's version changes (a
+  refreshed sheet, an added word), and results computed against an older
+  version are never stored.
+
+Waiters share the computed objects, so callers must treat results as
+read-only. Both styles of caller are served: the async methods (lookup,
+suggest, define) run the computation on a thread pool and await it, and
+run() blocks, for thread-per-session callers such as Streamlit. Counters
+(hits, misses, coalesced, evictions, expirations, invalidations) are
+available from stats().
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from dictionary_index import SUGGESTION_LIMIT
+
+CACHE_ENTRIES = 4096
+CACHE_TTL = 300.0  # seconds
+LOOKUP_THREADS = 4
+
+OPS = ("lookup", "suggest", "define")
+
+
+class CoalescingLookup:
+    """Coalesced, cached lookups over one DictionaryEngine."""
+
+    def __init__(self, engine, max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, executor=None):
+        if max_entries < 0 or ttl < 0:
+            raise ValueError("max_entries and ttl must not be negative")
+        self.engine = engine
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # key -> (expires at, result)
+        self._inflight = {}          # key -> Future
+        self._version = engine.version
+        self._counters = dict.fromkeys(("hits", "misses", "coalesced", "evictions",
+                                        "expirations", "invalidations"), 0)
+
+    # --- Public API ---
+
+    async def lookup(self, direction, query, limit=None):
+        """engine.lookup(), coalesced and cached; related_count is precomputed."""
+        return await self._await("lookup", direction, query, limit)
+
+    async def suggest(self, direction, query, limit=SUGGESTION_LIMIT):
+        """engine.suggest() without a cursor, coalesced and cached."""
+        return await self._await("suggest", direction, query, limit)
+
+    async def define(self, direction, word):
+        """engine.define(), coalesced and cached."""
+        return await self._await("define", direction, word, None)
+
+    def run(self, op, direction, query, limit=None):
+        """Blocking form of lookup / suggest / define for threaded callers."""
+        if op == "suggest" and limit is None:
+            limit = SUGGESTION_LIMIT
+        future, key, version = self._claim(op, direction, query, limit)
+        if key is not None:
+            # This caller leads: compute in its own thread
+            self._compute(future, key, version, op, direction, query, limit)
+        return future.result()
+
+    def stats(self):
+        """Counters plus the current entry count and hit rate."""
+        with self._lock:
+            stats = dict(self._counters, entries=len(self._cache), version=self._version)
+        served = stats["hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / served if served else 0.0
+        return stats
+
+    def clear(self):
+        """Drop every cached result (in-flight computations still complete)."""
+        with self._lock:
+            self._cache.clear()
+
+    # --- Internals ---
+
+    async def _await(self, op, direction, query, limit):
+        future, key, version = self._claim(op, direction, query, limit)
+        if key is not None:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(self._pool(), self._compute, future, key, version,
+                                 op, direction, query, limit)
+        return await asyncio.wrap_future(future)
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(LOOKUP_THREADS,
+                                                        thread_name_prefix="lookup")
+        return self._executor
+
+    def _claim(self, op, direction, query, limit):
+        """
+        Find a cached or in-flight result, or register a new computation.
+        Returns: (future, key, version); key is None unless the caller must compute
+        """
+        if op not in OPS:
+            raise ValueError(f"Unknown op: {op}")
+        # Raises KeyError for an unknown direction, as the engine does
+        key = (op, direction, self.engine.indexes[direction].normalize(query), limit)
+        now = time.monotonic()
+        with self._lock:
+            version = self.engine.version
+            if version != self._version:
+                self._version = version
+                self._cache.clear()
+                # Computations running against the old version finish for
+                # their own waiters; new requests start fresh ones
+                self._inflight.clear()
+                self._counters["invalidations"] += 1
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires > now:
+                    self._cache.move_to_end(key)
+                    self._counters["hits"] += 1
+                    future = Future()
+                    future.set_result(result)
+                    return future, None, version
+                del self._cache[key]
+                self._counters["expirations"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, None, version
+            self._counters["misses"] += 1
+            future = self._inflight[key] = Future()
+            return future, key, version
+
+    def _compute(self, future, key, version, op, direction, query, limit):
+        try:
+            if op == "lookup":
+                result = self.engine.lookup(direction, query, limit)
+                result.related_count  # computed once, before the result is shared
+            elif op == "suggest":
+                result = self.engine.suggest(direction, query, limit)
+            else:
+                result = self.engine.define(direction, query)
+        except BaseException as e:
+            with self._lock:
+                self._release(key, future)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._release(key, future)
+            # A result computed against an older version is served once, not kept
+            if self.max_entries and version == self._version == self.engine.version:
+                self._cache[key] = (time.monotonic() + self.ttl, result)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                    self._counters["evictions"] += 1
+        future.set_result(result)
+
+    def _release(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
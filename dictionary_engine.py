@@ -0,0 +1,387 @@
+"""Headless dictionary engine shared by the Tkinter and Streamlit apps.
+
+Everything below the UI lives here: loading the sheets, building the
+indexes, the lookup tiers, suggestions and adding words. The front ends only
+translate their widgets to these calls, so both behave the same and any
+indexing or caching change can be benchmarked without a GUI.
+
+Directions are "en-ml" (English → മലയാളം), "ml-en" (മലയാളം → English, the
+reverse of the English-Malayalam sheet) and "ml-ml" (മലയാളം → മലയാളം).
+
+Changes (refreshed sheets, added words) never modify an index in place: they
+produce a new OverlayIndex version and swap it in, so a lookup always sees
+one consistent version. Added words go through a WordJournal first, when one
+is attached.
+"""
+import math
+import threading
+import weakref
+
+import pandas as pd
+
+import metrics
+from dictionary_index import (SUGGESTION_LIMIT, DictionaryIndex, PrefixCursor,
+                              normalize_malayalam_key)
+from dictionary_overlay import diff_sheets, overlay_size, row_hashes, with_changes
+from dictionary_journal import COMPACT_AFTER
+from dictionary_snapshot import (SNAPSHOT_DIR, append_rows, load_sheet, snapshot_path_for,
+                                 write_snapshot)
+
+DIRECTIONS = ("en-ml", "ml-en", "ml-ml")
+
+# Indexes fed by each sheet, and whether they read it in reverse
+SHEET_DIRECTIONS = {
+    "en_ml": (("en-ml", False), ("ml-en", True)),
+    "ml_ml": (("ml-ml", False),),
+}
+
+# Rebuild a sheet's indexes once its overlay outgrows this share of its rows
+COMPACT_RATIO = 0.05
+
+BUILD_SECONDS = metrics.histogram("dictionary_index_build_seconds",
+                                  "Full index builds per sheet", ("sheet",))
+LOOKUP_SECONDS = metrics.histogram("dictionary_lookup_seconds",
+                                   "Engine lookups (all tiers)", ("direction",))
+SUGGEST_SECONDS = metrics.histogram("dictionary_suggest_seconds",
+                                    "Engine autocomplete calls", ("direction",))
+INDEX_ROWS = metrics.gauge("dictionary_index_rows", "Rows indexed per direction "
+                           "(of the most recently created engine)", ("direction",))
+INDEX_VERSION = metrics.gauge("dictionary_index_version",
+                              "Index swaps of the most recently created engine")
+
+
+def _define(index, word):
+    forms = index.exact_forms(index.normalize(word))
+    if not forms:
+        return None, ()
+    if len(forms) == 1:
+        return index.form_source(forms[0]), index.translations(forms[0])
+    # Case variants of the word, e.g. "Bank" and "bank"
+    translations = dict.fromkeys(t for form in forms for t in index.translations(form))
+    return index.form_source(forms[0]), tuple(translations)
+
+
+class DictionaryEngine:
+    """Lookups over the English-Malayalam and Malayalam-Malayalam sheets."""
+
+    def __init__(self, enml, mlml, indexes=None, lookup_counts=None):
+        """
+        Build the indexes from two cleaned 'from_content'/'to_content'
+        DataFrames, or serve prebuilt ``indexes`` ({direction: index}, e.g. a
+        SQLite database) with both sheets None.
+        lookup_counts: optional {direction: {normalized key: count}} that
+        lifts often looked-up words in the suggestion ranking
+        """
+        self.sheets = {"en_ml": enml, "ml_ml": mlml}
+        self.indexes = {}
+        self.lookup_counts = lookup_counts or {}
+        self.source_token = None
+        self.version = 0  # bumped on every index swap; tells caches they are stale
+        self._hashes = {}  # sheet -> row hashes of its current contents
+        self._local = {"en_ml": [], "ml_ml": []}  # words added here, not in the sheets
+        self._kept = {"en_ml": set(), "ml_ml": set()}  # journaled words; never removed
+        self._write_lock = threading.RLock()
+        self.journal = None
+        self._compact_targets = {}
+        self._uncompacted = 0
+        self._compacting = False
+        self._warm = False
+        if indexes is not None:
+            self.indexes = dict(indexes)
+        else:
+            self._build("en_ml")
+            self._build("ml_ml")
+        # Exported gauges read the engine without keeping it alive
+        engine = weakref.ref(self)
+        for direction in DIRECTIONS:
+            INDEX_ROWS.labels(direction).set_function(
+                lambda direction=direction: engine().size(direction) if engine() else math.nan)
+        INDEX_VERSION.set_function(lambda: engine().version if engine() else math.nan)
+
+    def _build(self, sheet):
+        """Full index build for one sheet, keeping words added locally."""
+        df = self.sheets[sheet]
+        indexes = dict(self.indexes)
+        counts = self.lookup_counts
+        with BUILD_SECONDS.labels(sheet).time():
+            if sheet == "en_ml":
+                indexes["en-ml"] = DictionaryIndex(df["from_content"], df["to_content"],
+                                                   lookup_counts=counts.get("en-ml"))
+                # Reverse index: Malayalam translations back to their English sources
+                indexes["ml-en"] = DictionaryIndex(df["to_content"], df["from_content"],
+                                                   normalize=normalize_malayalam_key,
+                                                   lookup_counts=counts.get("ml-en"))
+            else:
+                indexes["ml-ml"] = DictionaryIndex(df["from_content"], df["to_content"],
+                                                   lookup_counts=counts.get("ml-ml"))
+        self.indexes = indexes
+        self.version += 1
+        if self._local[sheet]:
+            self._apply(sheet, self._local[sheet], ())
+        if self._warm:
+            self._prepare([self.indexes[d] for d, _ in SHEET_DIRECTIONS[sheet]])
+
+    def _apply(self, sheet, added, removed):
+        """Swap in new index versions with pairs added and removed."""
+        df = self.sheets[sheet]
+        if df is not None:
+            rows = len(df) + len(self._local[sheet])
+        else:
+            index = self.indexes[SHEET_DIRECTIONS[sheet][0][0]]
+            rows = len(getattr(index, "base", index)) + len(self._local[sheet])
+        indexes = dict(self.indexes)
+        for direction, reverse in SHEET_DIRECTIONS[sheet]:
+            if reverse:
+                indexes[direction] = with_changes(indexes[direction],
+                                                  [(t, s) for s, t in added],
+                                                  [(t, s) for s, t in removed], rows)
+            else:
+                indexes[direction] = with_changes(indexes[direction], added, removed, rows)
+        # One assignment: a lookup sees either all old or all new versions
+        self.indexes = indexes
+        self.version += 1
+
+    @classmethod
+    def load(cls, enml_path, mlml_path, snapshot_dir=SNAPSHOT_DIR):
+        """Load both workbooks (through their compiled snapshots) and index them."""
+        enml = load_sheet(enml_path, "English-Malayalam", snapshot_dir=snapshot_dir)
+        mlml = load_sheet(mlml_path, "Malayalam-Malayalam", snapshot_dir=snapshot_dir)
+        return cls(enml, mlml)
+
+    @classmethod
+    def open_sqlite(cls, db_path):
+        """Serve a database compiled by dictionary_sqlite.build_database()."""
+        from dictionary_sqlite import open_database
+        return cls(None, None, indexes=open_database(db_path))
+
+    def warm_up(self):
+        """Build the typo indexes in background threads so the first miss is fast too."""
+        self._warm = True
+        self._prepare(self.indexes.values())
+
+    @staticmethod
+    def _prepare(indexes):
+        for index in indexes:
+            threading.Thread(target=index.prepare_fuzzy, daemon=True).start()
+
+    def refresh(self, enml=None, mlml=None):
+        """
+        Bring the indexes up to date with new contents of one or both sheets.
+        Only rows that differ from the previous contents are applied; a sheet
+        is rebuilt from scratch once its accumulated changes get large.
+        """
+        with self._write_lock:
+            for sheet, new in (("en_ml", enml), ("ml_ml", mlml)):
+                if new is None:
+                    continue
+                if self.sheets[sheet] is None:
+                    raise ValueError("Prebuilt indexes cannot be refreshed from a sheet; rebuild them")
+                old_hashes = self._hashes.get(sheet)
+                new_hashes = self._hashes[sheet] = row_hashes(new)
+                added, removed = diff_sheets(self.sheets[sheet], new, old_hashes, new_hashes)
+                resized = len(new) != len(self.sheets[sheet])
+                self.sheets[sheet] = new
+                if not added and not removed and not resized:
+                    continue
+                if self._local[sheet]:
+                    # Words added here that the sheet now has are no longer local
+                    arrived = set(added)
+                    self._local[sheet] = [pair for pair in self._local[sheet]
+                                          if pair not in arrived]
+                if self._kept[sheet]:
+                    # A journaled word missing from the new sheet stays (as local)
+                    kept = [pair for pair in removed if pair in self._kept[sheet]]
+                    if kept:
+                        removed = [pair for pair in removed if pair not in self._kept[sheet]]
+                        self._local[sheet].extend(kept)
+                direction = SHEET_DIRECTIONS[sheet][0][0]
+                pending = overlay_size(self.indexes[direction]) + len(added) + len(removed)
+                if pending > COMPACT_RATIO * max(len(new), 1):
+                    self._build(sheet)
+                else:
+                    self._apply(sheet, added, removed)
+
+    def reload(self, token, load):
+        """
+        Refresh from ``load()`` -> (enml, mlml) unless ``token`` (e.g. file
+        stamps) matches the one of the last load. Returns True if it reloaded.
+        """
+        if token == self.source_token:
+            return False
+        with self._write_lock:
+            if token == self.source_token:
+                return False
+            self.refresh(*load())
+            self.source_token = token
+            return True
+
+    def size(self, direction):
+        """Number of rows indexed for a direction."""
+        return len(self.indexes[direction])
+
+    # --- Lookups ---
+
+    def lookup(self, direction, query, limit=None):
+        """
+        Exact, prefix/contains and (on a miss) fuzzy matches for ``query``.
+        At most ``limit`` related matches are built.
+        Returns: SearchResults, unpacking as (suggestions, exact_matches, related_matches)
+        """
+        index = self.indexes[direction]
+        with LOOKUP_SECONDS.labels(direction).time():
+            return index.search(query, limit)
+
+    def cursor(self, direction):
+        """A PrefixCursor for one typist; pass it to suggest() on every keystroke."""
+        return PrefixCursor(self.indexes[direction])
+
+    def suggest(self, direction, query, limit=SUGGESTION_LIMIT, cursor=None):
+        """
+        Autocomplete words for ``query``: exact headwords, then words starting
+        with it, then words containing it, then (on a miss) near spellings.
+        With a cursor the prefix step resumes from the previous keystroke.
+        """
+        index = self.indexes[direction]
+        with SUGGEST_SECONDS.labels(direction).time():
+            return self._suggest(index, query, limit, cursor)
+
+    @staticmethod
+    def _suggest(index, query, limit, cursor):
+        key = index.normalize(query)
+        if not key:
+            return []
+
+        exact = index.exact_forms(key)
+        if cursor is not None:
+            if cursor.index is not index:
+                cursor.retarget(index)
+            prefix = cursor.forms(key)
+        else:
+            prefix = index.first_forms(index.prefix_range(key), limit)
+        forms = list(exact)
+        forms.extend(form for form in prefix if form not in exact)
+        if len(forms) < limit:
+            forms.extend(index.contains_forms(key, limit - len(forms)))
+        if not forms:
+            forms = index.fuzzy_forms(key, limit)
+        return [index.form_source(form) for form in forms[:limit]]
+
+    def define(self, direction, word):
+        """
+        Headword and unique translations for an exact (normalized) match.
+        Returns: (headword or None, translations)
+        """
+        return _define(self.indexes[direction], word)
+
+    def define_many(self, direction, words):
+        """define() for a batch of words, all answered by one index version."""
+        index = self.indexes[direction]
+        return [_define(index, word) for word in words]
+
+    # --- Updates ---
+
+    def add_entry(self, direction, source, target):
+        """Add one word pair; English-Malayalam pairs update both of their indexes."""
+        if direction == "en-ml":
+            sheet, pair = "en_ml", (source, target)
+        elif direction == "ml-en":
+            sheet, pair = "en_ml", (target, source)
+        elif direction == "ml-ml":
+            sheet, pair = "ml_ml", (source, target)
+        else:
+            raise ValueError(f"Unknown direction: {direction}")
+        with self._write_lock:
+            if self.journal is not None:
+                # Durable before it is visible
+                self.journal.append(sheet, *pair)
+                self._kept[sheet].add(pair)
+                self._uncompacted += 1
+            self._local[sheet].append(pair)
+            self._apply(sheet, [pair], ())
+            if self._uncompacted >= COMPACT_AFTER:
+                self.compact_in_background()
+
+    # --- Journal ---
+
+    def attach_journal(self, journal, targets):
+        """
+        Replay a WordJournal's words and journal every later addition.
+        targets: {sheet: (source_path, snapshot_dir, rewrite_source)} used by
+        compact(); with rewrite_source the workbook itself absorbs the words.
+        """
+        with self._write_lock:
+            self.journal = journal
+            self._compact_targets = dict(targets)
+            entries = journal.entries()
+            self._uncompacted = len(entries)
+            for sheet in SHEET_DIRECTIONS:
+                pairs = list(dict.fromkeys((source, target) for entry_sheet, source, target
+                                           in entries if entry_sheet == sheet))
+                self._kept[sheet].update(pairs)
+                # Words already compacted into the snapshot are in the base index
+                index = self.indexes[SHEET_DIRECTIONS[sheet][0][0]]
+                pending = [pair for pair in pairs if not index.has_pair(*pair)]
+                if pending:
+                    self._local[sheet].extend(pending)
+                    self._apply(sheet, pending, ())
+
+    def compact_in_background(self):
+        """Start compact() on a daemon thread unless one is running."""
+        with self._write_lock:
+            if self._compacting or self.journal is None:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """
+        Fold journaled words into the sheet snapshots, and into the workbooks
+        where the targets allow it (the journal is then emptied).
+        """
+        try:
+            with self._write_lock:
+                entries = self.journal.entries()
+                count = len(entries)
+                journaled = {entry[0] for entry in entries}
+                work = {sheet: (self.sheets[sheet], list(self._local[sheet]))
+                        for sheet in self._compact_targets if self.sheets[sheet] is not None}
+            if not count:
+                return
+
+            merged_sheets = {}
+            emptied = bool(work)
+            for sheet, (df, local) in work.items():
+                source_path, snapshot_dir, rewrite_source = self._compact_targets[sheet]
+                emptied = emptied and rewrite_source
+                # Words folded into a snapshot earlier are in df but maybe not
+                # in the workbook yet
+                if not local and not (rewrite_source and sheet in journaled):
+                    continue
+                merged = pd.concat([df, pd.DataFrame(local, columns=["from_content", "to_content"])],
+                                   ignore_index=True)
+                if rewrite_source:
+                    # Only the journaled rows are appended, so the workbook's
+                    # other columns and formatting survive
+                    append_rows(source_path, [(source, target) for entry_sheet, source, target
+                                              in entries if entry_sheet == sheet])
+                write_snapshot(merged, snapshot_path_for(source_path, snapshot_dir), source_path)
+                merged_sheets[sheet] = (df, merged, set(local))
+
+            with self._write_lock:
+                for sheet, (df, merged, folded) in merged_sheets.items():
+                    if self.sheets[sheet] is not df:
+                        continue  # refreshed meanwhile; the words stay local
+                    self.sheets[sheet] = merged
+                    self._hashes.pop(sheet, None)
+                    self._local[sheet] = [pair for pair in self._local[sheet]
+                                          if pair not in folded]
+                if emptied:
+                    # Every word now lives in a workbook: the journal can go
+                    self.journal.discard(count)
+                    for sheet in self._kept:
+                        self._kept[sheet].clear()
+                    for entry_sheet, source, target in self.journal.entries():
+                        self._kept[entry_sheet].add((source, target))
+                self._uncompacted = len(self.journal.entries()) if emptied else 0
+        finally:
+            self._compacting = False
@@ -0,0 +1,111 @@
+"""Typo-tolerant lookups for queries that match nothing exactly.
+
+A SymSpell-style deletion index: every key is stored under the strings made
+by deleting up to ``MAX_EDITS`` clusters from its first ``PREFIX_LENGTH``
+clusters. A query generates its own deletes, so candidates come from a few
+hash probes instead of a scan, and only those candidates are verified with a
+real edit distance. Distances count grapheme clusters, so a Malayalam
+consonant with its vowel sign or a conjunct is one edit, not several.
+"""
+import heapq
+import time
+import unicodedata
+from array import array
+
+import numpy as np
+
+MAX_EDITS = 1         # deletes stored per key (and generated per query)
+MAX_DISTANCE = 2      # largest edit distance returned
+PREFIX_LENGTH = 7     # only the first clusters of a key get deletes
+MAX_CANDIDATES = 200  # bounds verification work per query ...
+TIME_BUDGET = 0.003   # ... and so does a wall-clock budget (seconds)
+
+_VIRAMA = "്"
+
+
+def graphemes(text):
+    """Split text into user-perceived characters (grapheme clusters)."""
+    if text.isascii():
+        return list(text)
+    clusters = []
+    for ch in text:
+        # Vowel signs, virama and anusvara attach to their base; a consonant
+        # after a virama continues the conjunct.
+        if clusters and (unicodedata.category(ch)[0] == "M"
+                         or (clusters[-1].endswith(_VIRAMA) and "ക" <= ch <= "ഹ")):
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+    return clusters
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, before[j - 2] + 1)
+            cur[j] = value
+        if min(cur) > limit:
+            return limit + 1
+        before, prev = prev, cur
+    return prev[-1]
+
+
+def _deletes(clusters):
+    """Strings made by deleting up to MAX_EDITS clusters from the key prefix."""
+    level = {tuple(clusters[:PREFIX_LENGTH])}
+    found = set(level)
+    for _ in range(MAX_EDITS):
+        level = {head[:i] + head[i + 1:] for head in level for i in range(len(head))}
+        found |= level
+    return {"".join(head) for head in found}
+
+
+class FuzzyIndex:
+    """Deletion index over a list of normalized keys; ids are list positions."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        hashes = array("q")
+        ids = array("i")
+        for key_id, key in enumerate(self.keys):
+            for delete in _deletes(graphemes(key)):
+                hashes.append(hash(delete))
+                ids.append(key_id)
+        # Two parallel sorted arrays keep the index at ~12 bytes per delete.
+        hashes = np.frombuffer(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind="stable")
+        self._hashes = hashes[order]
+        self._ids = np.frombuffer(ids, dtype=np.int32)[order]
+
+    def lookup(self, query, limit):
+        """Ids of the ``limit`` nearest keys, by (distance, key id)."""
+        deadline = time.perf_counter() + TIME_BUDGET
+        clusters = graphemes(query)
+        # Probe the query itself first: it finds every key one delete away.
+        deletes = sorted(_deletes(clusters), key=len, reverse=True)
+        probes = np.array([hash(delete) for delete in deletes], dtype=np.int64)
+        lo = np.searchsorted(self._hashes, probes, side="left")
+        hi = np.searchsorted(self._hashes, probes, side="right")
+
+        candidates = {}
+        for start, end in zip(lo.tolist(), hi.tolist()):
+            candidates.update(dict.fromkeys(self._ids[start:end].tolist()))
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+
+        scored = []
+        for checked, key_id in enumerate(list(candidates)[:MAX_CANDIDATES]):
+            if checked % 16 == 15 and time.perf_counter() > deadline:
+                break
+            distance = edit_distance(clusters, graphemes(self.keys[key_id]), MAX_DISTANCE)
+            if distance <= MAX_DISTANCE:
+                scored.append((distance, key_id))
+        return [key_id for _, key_id in heapq.nsmallest(limit, scored)]
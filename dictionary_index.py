@@ -0,0 +1,458 @@
+"""Prebuilt lookup index for the dictionary sheets.
+
+The index is built once when a sheet is loaded so that a search never has to
+re-lowercase or scan the whole column again. It answers the three match tiers
+used by both apps:
+
+* exact    - rows whose normalized source equals the query
+* prefix   - distinct source words that start with the query
+* contains - distinct source words that contain the query anywhere else
+
+When all three come back empty, a fuzzy tier offers the nearest headwords.
+
+Matches come back in rank order. Every headword gets a static rank when the
+index is built (see rank_forms), and forms are numbered best rank first, so
+"the first k matches" are the k best ones. A segment tree over the sorted
+keys yields the top k of any prefix range in O(k log n), however many words
+share the prefix.
+"""
+import heapq
+import math
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+import numpy as np
+
+import metrics
+
+from dictionary_fuzzy import FuzzyIndex
+
+# Keys are joined into one text blob for substring search. Cells read from
+# .xlsx files can never contain NUL, so it is a safe separator.
+_SEPARATOR = "\x00"
+_MAX_CHAR = "\U0010ffff"
+# Substring postings are memoized for query grams up to this length.
+GRAM_SIZE = 3
+SUGGESTION_LIMIT = 20
+
+# Static rank: a headword's score grows with how often it is looked up and
+# how many senses it has, and shrinks with its length.
+RANK_LOOKUP_WEIGHT = 2.0   # per doubling of the lookup count
+RANK_SENSE_WEIGHT = 1.0    # per doubling of the number of translations
+RANK_LENGTH_WEIGHT = 0.15  # per character
+_NO_FORM = 2**31 - 1       # segment tree padding, worse than any form id
+
+SEARCH_TIER_SECONDS = metrics.histogram("dictionary_search_tier_seconds",
+                                        "Time spent in each search tier", ("tier",))
+
+# Old-style chillus are consonant + virama + ZWJ (what the on-screen keyboard
+# types); Unicode 5.1 added atomic code points for them (U+0D7A-U+0D7F).
+_LEGACY_CHILLU = re.compile("([\u0d23\u0d28\u0d30\u0d32\u0d33\u0d15])\u0d4d\u200d")
+_ATOMIC_CHILLU = {
+    "\u0d23": "\u0d7a",  # ണ് -> ൺ
+    "\u0d28": "\u0d7b",  # ന് -> ൻ
+    "\u0d30": "\u0d7c",  # ര് -> ർ
+    "\u0d32": "\u0d7d",  # ല് -> ൽ
+    "\u0d33": "\u0d7e",  # ള് -> ൾ
+    "\u0d15": "\u0d7f",  # ക് -> ൿ
+}
+_JOINERS = str.maketrans("", "", "\u200c\u200d" + _SEPARATOR)
+
+
+def normalize_text(text):
+    """
+    Give every spelling of a Malayalam word one canonical form: NFC, atomic
+    chillus, the modern AU length mark and no ZWJ/ZWNJ. ASCII passes through.
+    """
+    text = str(text)
+    if text.isascii():
+        return text.replace(_SEPARATOR, "")
+    text = unicodedata.normalize("NFC", text)
+    text = _LEGACY_CHILLU.sub(lambda m: _ATOMIC_CHILLU[m.group(1)], text)
+    # NFC composes െ + ൗ into ൌ (U+0D4C); current spelling uses ൗ alone.
+    text = text.replace("\u0d4c", "\u0d57")
+    return text.translate(_JOINERS)
+
+
+def normalize_key(text):
+    """Normalize a headword or a query for matching."""
+    return normalize_text(text).strip().casefold()
+
+
+def normalize_malayalam_key(text):
+    """Normalize a Malayalam headword or query (the script has no case)."""
+    return normalize_text(text).strip()
+
+
+def rank_forms(grouped, normalize, lookup_counts=None):
+    """
+    Order grouped {source: translations} best first; ties keep sheet order.
+    lookup_counts: optional {normalized key: number of lookups}
+    Returns: [(source, translations, key), ...]
+    """
+    counts = lookup_counts or {}
+    log2 = math.log2
+    scored = []
+    for position, (source, translations) in enumerate(grouped.items()):
+        key = normalize(source)
+        score = (RANK_SENSE_WEIGHT * log2(len(translations))
+                 - RANK_LENGTH_WEIGHT * len(key))
+        if counts:
+            score += RANK_LOOKUP_WEIGHT * log2(1 + counts.get(key, 0))
+        scored.append((-score, position, source, translations, key))
+    scored.sort()
+    return [(source, translations, key) for _, _, source, translations, key in scored]
+
+
+class DictionaryIndex:
+    """Exact, prefix and contains lookups over one (source, target) sheet.
+
+    Rows are grouped once at build time: each distinct source string (a
+    "form") keeps a tuple of its unique translations in sheet order, with
+    all strings interned, so polysemous headwords are stored once and
+    lookups never deduplicate. Forms are numbered by static rank (forms
+    added later go last), so sorting by form id gives the best matches
+    first. ``normalize`` turns both source strings and queries into keys;
+    ``lookup_counts`` ({key: count}, optional) feeds the rank.
+    """
+
+    def __init__(self, sources, targets, normalize=normalize_key, lookup_counts=None):
+        self.normalize = normalize
+        self.rows = 0
+
+        self._form_ids = {}          # source string -> form id
+        self._forms = []             # form id -> source string
+        self._form_translations = [] # form id -> (translation, ...)
+        self._form_keys = []         # form id -> normalized key
+        self._key_forms = {}         # normalized key -> [form id, ...]
+
+        grouped = {}
+        for source, target in zip(sources, targets):
+            grouped.setdefault(sys.intern(source), {})[sys.intern(target)] = None
+            self.rows += 1
+        for form, (source, translations, key) in enumerate(
+                rank_forms(grouped, normalize, lookup_counts)):
+            self._form_ids[source] = form
+            self._forms.append(source)
+            self._form_translations.append(tuple(translations))
+            self._form_keys.append(key)
+            self._key_forms.setdefault(key, []).append(form)
+        del grouped
+
+        # Sorted distinct keys answer prefix queries with two bisections.
+        self._sorted_keys = sorted(self._key_forms)
+        self._best = None  # segment tree for top-k prefix queries
+        self._best_size = 0
+        self._build_best()
+
+        # All form keys joined in form order; str.find over the blob walks
+        # the matches in form order, and _starts maps a hit back to its form.
+        self._blob = _SEPARATOR.join(self._form_keys) + _SEPARATOR
+        self._starts = array("q", [0])
+        for key in self._form_keys:
+            self._starts.append(self._starts[-1] + len(key) + 1)
+        self._grams = {}  # gram -> array of form ids containing it
+        # Typo index, built on the first query that needs it.
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+
+    def __len__(self):
+        return self.rows
+
+    # --- Tiers ---
+
+    def exact_forms(self, key):
+        """Forms whose normalized source equals ``key``, in rank order."""
+        return self._key_forms.get(key, [])
+
+    def prefix_forms(self, key, limit=None):
+        """Forms starting with ``key`` (excluding exact hits), in rank order."""
+        lo, hi = self.prefix_range(key)
+        if lo < hi and self._sorted_keys[lo] == key:
+            lo += 1  # the exact key sorts first
+        if limit is not None:
+            return self._top_forms(lo, hi, limit)
+        key_forms = self._key_forms
+        return sorted(form for candidate in self._sorted_keys[lo:hi]
+                      for form in key_forms[candidate])
+
+    def full_range(self):
+        """Slice covering every sorted key."""
+        return 0, len(self._sorted_keys)
+
+    def prefix_range(self, key, within=None):
+        """Slice (lo, hi) of the sorted keys starting with ``key``, searched within a slice."""
+        keys = self._sorted_keys
+        lo, hi = within or self.full_range()
+        lo = bisect_left(keys, key, lo, hi)
+        return lo, bisect_left(keys, key + _MAX_CHAR, lo, hi)
+
+    def first_forms(self, span, limit):
+        """The ``limit`` best-ranked forms whose keys lie in the sorted slice ``span``."""
+        return self._top_forms(span[0], span[1], limit)
+
+    def contains_forms(self, key, limit=None):
+        """Forms containing ``key`` but not starting with it, in rank order."""
+        if len(key) <= GRAM_SIZE:
+            candidates = self._posting(key)
+            verify = False
+        else:
+            candidates = self._posting(key[:GRAM_SIZE])
+            verify = True
+        form_keys = self._form_keys
+        forms = (
+            form for form in candidates
+            if (not verify or key in form_keys[form])
+            and not form_keys[form].startswith(key)
+        )
+        return list(islice(forms, limit))
+
+    def count_related(self, key):
+        """Number of prefix and contains matches, without materializing them."""
+        lo, hi = self.prefix_range(key)
+        key_forms = self._key_forms
+        prefix = sum(len(key_forms[candidate]) for candidate in self._sorted_keys[lo:hi]
+                     if candidate != key)
+        if len(key) > GRAM_SIZE:
+            return prefix + len(self.contains_forms(key))
+        # The posting of a short key holds every form containing it, which
+        # includes the exact and prefix hits.
+        return len(self._posting(key)) - len(self.exact_forms(key))
+
+    def prepare_fuzzy(self):
+        """Build the typo index now (it is otherwise built on first use)."""
+        with self._fuzzy_lock:
+            if self._fuzzy is None:
+                self._fuzzy = FuzzyIndex(self._key_forms)
+        return self._fuzzy
+
+    def fuzzy_forms(self, key, limit=SUGGESTION_LIMIT):
+        """Forms whose keys are a few edits away from ``key``, nearest first."""
+        fuzzy = self._fuzzy or self.prepare_fuzzy()
+        forms = [form for key_id in fuzzy.lookup(key, limit)
+                 for form in self._key_forms[fuzzy.keys[key_id]]]
+        return forms[:limit]
+
+    # --- Top-k ---
+
+    def _build_best(self):
+        """Segment tree holding the best (lowest) form id of every key range."""
+        keys, key_forms = self._sorted_keys, self._key_forms
+        size = 1
+        while size < len(keys):
+            size *= 2
+        tree = np.full(2 * size, _NO_FORM, dtype=np.int32)
+        # A key's forms are listed in id order, so its best form comes first
+        tree[size:size + len(keys)] = np.fromiter((key_forms[key][0] for key in keys),
+                                                  dtype=np.int32, count=len(keys))
+        level = size
+        while level > 1:
+            tree[level // 2:level] = np.minimum(tree[level:2 * level:2],
+                                                tree[level + 1:2 * level:2])
+            level //= 2
+        self._best = array("i", tree.tobytes())
+        self._best_size = size
+
+    def _range_best(self, lo, hi):
+        """Best form id among the sorted keys [lo, hi)."""
+        tree, best = self._best, _NO_FORM
+        lo += self._best_size
+        hi += self._best_size
+        while lo < hi:
+            if lo & 1:
+                best = min(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = min(best, tree[hi])
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def _top_forms(self, lo, hi, limit):
+        """The ``limit`` best forms whose keys lie in the sorted slice [lo, hi), best first."""
+        keys, key_forms = self._sorted_keys, self._key_forms
+        if hi - lo <= 4 * limit:
+            return heapq.nsmallest(limit, (form for key in keys[lo:hi] for form in key_forms[key]))
+        form_keys = self._form_keys
+        # Pop the best form of a range, then split the range around its key
+        heap = [(self._range_best(lo, hi), lo, hi)]
+        forms = []
+        while heap and len(forms) < limit:
+            form, lo, hi = heapq.heappop(heap)
+            forms.append(form)
+            if lo < 0:
+                continue  # a further form of a key already split off
+            key = form_keys[form]
+            for other in key_forms[key][1:]:
+                heapq.heappush(heap, (other, -1, -1))
+            pos = bisect_left(keys, key, lo, hi)
+            if lo < pos:
+                heapq.heappush(heap, (self._range_best(lo, pos), lo, pos))
+            if pos + 1 < hi:
+                heapq.heappush(heap, (self._range_best(pos + 1, hi), pos + 1, hi))
+        return forms
+
+    def _posting(self, gram):
+        """Form ids whose key contains ``gram``, memoized per gram."""
+        posting = self._grams.get(gram)
+        if posting is not None:
+            return posting
+        posting = array("i")
+        blob, starts = self._blob, self._starts
+        pos = blob.find(gram)
+        while pos != -1:
+            form = bisect_right(starts, pos) - 1
+            posting.append(form)
+            # Skip the rest of this key; one hit per form is enough.
+            pos = blob.find(gram, starts[form + 1])
+        self._grams[gram] = posting
+        return posting
+
+    def form_id(self, source):
+        """Form id of an exact source string, or None."""
+        return self._form_ids.get(source)
+
+    def form_count(self):
+        """Number of forms; ids run from 0 to form_count() - 1."""
+        return len(self._forms)
+
+    def form_key(self, form):
+        """Normalized key of a form id."""
+        return self._form_keys[form]
+
+    def has_pair(self, source, target):
+        """Whether the sheet has a (source, target) row."""
+        form = self._form_ids.get(source)
+        return form is not None and target in self._form_translations[form]
+
+    def form_source(self, form):
+        """Source string of a form id."""
+        return self._forms[form]
+
+    def translations(self, form):
+        """Unique translations of a form, in sheet order."""
+        return self._form_translations[form]
+
+    # --- Search ---
+
+    def search(self, query, limit=None):
+        """
+        Run all three tiers for ``query``.
+        Only the first ``limit`` related matches are built; the full count is
+        available as ``related_count``.
+        Returns: SearchResults, which unpacks as
+        (suggestions: list, exact_matches: list, related_matches: list)
+        """
+        key = self.normalize(query)
+        if not key:
+            return SearchResults([], [], [])
+
+        clock = SEARCH_TIER_SECONDS.timer()
+        form_source, translations = self.form_source, self.translations
+        exact = [(form_source(form), translation)
+                 for form in self.exact_forms(key)
+                 for translation in translations(form)]
+        clock.lap("exact")
+
+        # Suggestions need the first SUGGESTION_LIMIT related words either way
+        wanted = None if limit is None else max(limit, SUGGESTION_LIMIT)
+        related_forms = self.prefix_forms(key, wanted)
+        clock.lap("prefix")
+        if wanted is None or len(related_forms) < wanted:
+            related_forms += self.contains_forms(
+                key, None if wanted is None else wanted - len(related_forms))
+            clock.lap("contains")
+        fuzzy = not exact and not related_forms
+        if fuzzy:
+            related_forms = self.fuzzy_forms(key)
+            clock.lap("fuzzy")
+        related = [(form_source(form), translations(form)[0]) for form in related_forms]
+
+        suggestions = list(dict.fromkeys(word for word, _ in exact))
+        suggestions.extend(word for word, _ in related[:SUGGESTION_LIMIT])
+
+        if fuzzy or wanted is None or len(related) < wanted:
+            count = len(related)
+        else:
+            count = lambda: self.count_related(key)
+        return SearchResults(suggestions[:SUGGESTION_LIMIT], exact, related[:limit], count)
+
+
+class SearchResults:
+    """Results of one search; unpacks as (suggestions, exact, related).
+
+    ``related`` may be truncated to the caller's limit. ``related_count`` is
+    the number of related matches overall and, when the list was truncated,
+    is only computed the first time it is read.
+    """
+
+    def __init__(self, suggestions, exact, related, related_count=None):
+        self.suggestions = suggestions
+        self.exact = exact
+        self.related = related
+        # An int, or a callable that computes it on demand
+        self._related_count = len(related) if related_count is None else related_count
+
+    def __iter__(self):
+        return iter((self.suggestions, self.exact, self.related))
+
+    def __getitem__(self, item):
+        return (self.suggestions, self.exact, self.related)[item]
+
+    @property
+    def related_count(self):
+        if callable(self._related_count):
+            self._related_count = self._related_count()
+        return self._related_count
+
+
+class PrefixCursor:
+    """Incremental prefix lookups for search-as-you-type.
+
+    The sorted key list forms an implicit trie: every prefix is a node given
+    by the slice of keys that start with it. The cursor keeps the path of
+    nodes for the last query, so typing one more character narrows the
+    previous slice and backspacing pops back to a node already computed.
+    """
+
+    def __init__(self, index, limit=SUGGESTION_LIMIT):
+        self.index = index
+        self.limit = limit
+        self._reset()
+
+    def _reset(self):
+        # (prefix, span, forms or None)
+        self._path = [("", self.index.full_range(), None)]
+
+    def retarget(self, index):
+        """Follow a newer version of the index."""
+        self.index = index
+        self._reset()
+
+    def _seek(self, key):
+        path = self._path
+        while not key.startswith(path[-1][0]):
+            path.pop()
+        prefix, span, _ = path[-1]
+        for end in range(len(prefix) + 1, len(key) + 1):
+            span = self.index.prefix_range(key[:end], span)
+            path.append((key[:end], span, None))
+        return path[-1]
+
+    def forms(self, key):
+        """Best ``limit`` form ids (in rank order) whose keys start with ``key``."""
+        prefix, span, cached = self._seek(key)
+        if cached is None:
+            cached = self.index.first_forms(span, self.limit)
+            self._path[-1] = (prefix, span, cached)
+        return cached
+
+    def suggestions(self, key):
+        """Best ``limit`` distinct source words starting with ``key``."""
+        return [self.index.form_source(form) for form in self.forms(key)]
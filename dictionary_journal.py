@@ -0,0 +1,81 @@
+"""Append-only journal of words added by users.
+
+Adding a word writes one JSON line and fsyncs it before the word is indexed,
+so an addition costs O(1) disk work and survives a crash. A torn last line
+(a crash mid-write) is ignored on replay. Compaction folds the journaled
+words into the sheet snapshots (and, for a local workbook, into the workbook
+itself) in the background, off the path of the add.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+
+from dictionary_snapshot import SNAPSHOT_DIR
+
+JOURNAL_PATH = SNAPSHOT_DIR / "additions.journal"
+COMPACT_AFTER = 25  # journaled words that trigger a background compaction
+
+
+class WordJournal:
+    """Durable (sheet, source, target) additions, in the order they were made."""
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, sheet, source, target):
+        """Write one addition and return once it is on disk."""
+        line = json.dumps({"sheet": sheet, "source": source, "target": target},
+                          ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "ab+") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Close off a torn line left by a crash
+                        line = "\n" + line
+                f.write(line.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _read(self):
+        """(line, entry) for every complete line; entry is None if unreadable."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            if not line.endswith("\n"):
+                break  # torn write from a crash
+            try:
+                entry = json.loads(line)
+                records.append((line, (entry["sheet"], entry["source"], entry["target"])))
+            except (ValueError, KeyError):
+                records.append((line, None))
+        return records
+
+    def entries(self):
+        """All complete additions as (sheet, source, target) tuples."""
+        with self._lock:
+            return [entry for _, entry in self._read() if entry is not None]
+
+    def discard(self, count):
+        """Drop the first ``count`` additions (already compacted), atomically."""
+        with self._lock:
+            keep = []
+            for line, entry in self._read():
+                if entry is not None and count > 0:
+                    count -= 1
+                else:
+                    keep.append(line)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(keep)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,209 @@
+"""Versioned overlays for applying sheet changes without a rebuild.
+
+A full DictionaryIndex build normalizes, sorts and joins every key, so it
+scales with the dictionary. An OverlayIndex instead keeps a built index as
+an immutable base and layers a small index of added rows plus a set of
+hidden (removed) base rows on top. Every change produces a new
+OverlayIndex, at a cost proportional to the overlay, while readers holding
+the previous version keep a consistent view until they pick up the new one.
+
+Overlay form ids follow the base ids, so "sheet order" is base rows first,
+then rows added since the base was built.
+"""
+import numpy as np
+
+from dictionary_index import SUGGESTION_LIMIT, DictionaryIndex
+
+
+def row_hashes(df):
+    """64-bit hash of every (source, target) row, valid within this process."""
+    rows = zip(df["from_content"].tolist(), df["to_content"].tolist())
+    return np.fromiter(map(hash, rows), dtype=np.int64, count=len(df))
+
+
+def diff_sheets(old, new, old_hashes=None, new_hashes=None):
+    """
+    Rows of two cleaned sheets that differ, compared by row hash.
+    Returns: (added, removed) lists of unique (source, target) pairs, in sheet order
+    """
+    if old_hashes is None:
+        old_hashes = row_hashes(old)
+    if new_hashes is None:
+        new_hashes = row_hashes(new)
+
+    def pairs(df, hashes, other):
+        # Rows whose hash does not occur in the other sheet
+        ordered = np.sort(other)
+        if len(ordered):
+            found = ordered[np.searchsorted(ordered, hashes).clip(max=len(ordered) - 1)] == hashes
+            rows = np.flatnonzero(~found)
+        else:
+            rows = np.arange(len(hashes))
+        changed = df.iloc[rows]
+        return list(dict.fromkeys(zip(changed["from_content"].tolist(),
+                                      changed["to_content"].tolist())))
+
+    return pairs(new, new_hashes, old_hashes), pairs(old, old_hashes, new_hashes)
+
+
+class OverlayIndex:
+    """A DictionaryIndex plus added and removed rows, read as one index."""
+
+    def __init__(self, base, added, removed, rows):
+        """
+        base: DictionaryIndex or SqliteIndex, never modified
+        added: (source, target) pairs not in the base, in order
+        removed: (source, target) pairs of the base to hide
+        rows: row count of the combined sheet
+        """
+        self.base = base
+        self.normalize = base.normalize
+        self.rows = rows
+        self.added = tuple(added)
+        self.removed = frozenset(removed)
+        self.overlay = DictionaryIndex([s for s, _ in self.added], [t for _, t in self.added],
+                                       normalize=base.normalize)
+        self._offset = base.form_count()
+
+        # Base forms that lost translations; those that lost all of them are dead
+        self._trimmed = {}
+        for source, target in self.removed:
+            form = base.form_id(source)
+            remaining = self._trimmed.get(form, base.translations(form))
+            self._trimmed[form] = tuple(t for t in remaining if t != target)
+        self._dead = {form for form, remaining in self._trimmed.items() if not remaining}
+
+        # New translations of a live base headword extend that form instead
+        # of listing the headword twice.
+        self._extra = {}     # base form -> added translations
+        self._hidden = set()  # overlay forms merged into a base form
+        for form in range(self.overlay.form_count()):
+            base_form = base.form_id(self.overlay.form_source(form))
+            if base_form is not None and base_form not in self._dead:
+                self._extra[base_form] = self.overlay.translations(form)
+                self._hidden.add(form)
+
+    def __len__(self):
+        return self.rows
+
+    def _live(self, forms, limit=None):
+        """Base forms that are not dead."""
+        if self._dead:
+            forms = [form for form in forms if form not in self._dead]
+        return forms if limit is None else forms[:limit]
+
+    def _lift(self, forms, limit=None):
+        """Overlay forms that are not merged, as combined ids."""
+        offset = self._offset
+        forms = [offset + form for form in forms if form not in self._hidden]
+        return forms if limit is None else forms[:limit]
+
+    def _combine(self, tier, key, limit):
+        """
+        The ``tier`` method of both layers in sheet order; over-fetches to cover
+        filtered forms. Each layer runs its own method, so the base can be any
+        index with the tier API (a DictionaryIndex or a SqliteIndex).
+        """
+        base, overlay = getattr(self.base, tier), getattr(self.overlay, tier)
+        if limit is None:
+            return self._live(base(key)) + self._lift(overlay(key))
+        forms = self._live(base(key, limit + len(self._dead)), limit)
+        if len(forms) < limit:
+            forms += self._lift(overlay(key, limit + len(self._hidden)), limit - len(forms))
+        return forms
+
+    # --- Tiers (same interface as DictionaryIndex) ---
+
+    def exact_forms(self, key):
+        return self._live(self.base.exact_forms(key)) + self._lift(self.overlay.exact_forms(key))
+
+    def prefix_forms(self, key, limit=None):
+        return self._combine("prefix_forms", key, limit)
+
+    def contains_forms(self, key, limit=None):
+        return self._combine("contains_forms", key, limit)
+
+    def full_range(self):
+        return self.base.full_range(), self.overlay.full_range()
+
+    def prefix_range(self, key, within=None):
+        base_span, overlay_span = within or (None, None)
+        return (self.base.prefix_range(key, base_span),
+                self.overlay.prefix_range(key, overlay_span))
+
+    def first_forms(self, span, limit):
+        forms = self._live(self.base.first_forms(span[0], limit + len(self._dead)), limit)
+        if len(forms) < limit:
+            forms += self._lift(self.overlay.first_forms(span[1], limit + len(self._hidden)),
+                                limit - len(forms))
+        return forms
+
+    def count_related(self, key):
+        def related(form_key):
+            return form_key != key and key in form_key
+
+        count = self.base.count_related(key) + self.overlay.count_related(key)
+        count -= sum(related(self.base.form_key(form)) for form in self._dead)
+        count -= sum(related(self.overlay.form_key(form)) for form in self._hidden)
+        return count
+
+    def prepare_fuzzy(self):
+        self.base.prepare_fuzzy()
+        self.overlay.prepare_fuzzy()
+
+    def fuzzy_forms(self, key, limit=SUGGESTION_LIMIT):
+        return self._combine("fuzzy_forms", key, limit)
+
+    def form_id(self, source):
+        form = self.base.form_id(source)
+        if form is not None and form not in self._dead:
+            return form
+        form = self.overlay.form_id(source)
+        return None if form is None or form in self._hidden else self._offset + form
+
+    def form_source(self, form):
+        if form < self._offset:
+            return self.base.form_source(form)
+        return self.overlay.form_source(form - self._offset)
+
+    def translations(self, form):
+        if form < self._offset:
+            return self._trimmed.get(form, self.base.translations(form)) + self._extra.get(form, ())
+        return self.overlay.translations(form - self._offset)
+
+    def has_pair(self, source, target):
+        form = self.form_id(source)
+        return form is not None and target in self.translations(form)
+
+    # Search runs the tiers above exactly as it does on a plain index
+    search = DictionaryIndex.search
+
+
+def with_changes(index, added=(), removed=(), rows=None):
+    """
+    A new version of ``index`` with (source, target) pairs added and removed,
+    holding ``rows`` rows (default: unchanged).
+    Cost grows with the size of the overlay, not of the base index.
+    """
+    if isinstance(index, OverlayIndex):
+        base, overlay, hidden = index.base, dict.fromkeys(index.added), set(index.removed)
+    else:
+        base, overlay, hidden = index, {}, set()
+    for pair in removed:
+        if pair in overlay:
+            del overlay[pair]
+        elif base.has_pair(*pair):
+            hidden.add(pair)
+    for pair in added:
+        if pair in hidden:
+            hidden.discard(pair)
+        elif not base.has_pair(*pair):
+            overlay[pair] = None
+    return OverlayIndex(base, overlay, hidden, len(index) if rows is None else rows)
+
+
+def overlay_size(index):
+    """Number of added plus hidden rows carried on top of the base index."""
+    if isinstance(index, OverlayIndex):
+        return len(index.added) + len(index.removed)
+    return 0
@@ -0,0 +1,336 @@
+"""HTTP/JSON lookup service for other tools, served by pre-forked workers.
+
+    python dictionary_server.py --port 8080 --workers 4
+    python dictionary_server.py --sqlite .cache_data/dictionary.sqlite --workers 8
+
+The parent process loads the sheets and builds every index (typo indexes
+included) once, freezes the heap with gc.freeze() and then forks the
+workers, which all accept on the same listening socket. The indexes are
+never written after the fork, and frozen objects are skipped by the garbage
+collector, so the workers share the parent's pages copy-on-write instead of
+holding N copies. With --sqlite the indexes live in a database file instead;
+each worker memory-maps it and the pages are shared through the OS page
+cache. /health reports each worker's resident and private memory.
+
+Endpoints (JSON in and out; ``direction`` is en-ml, ml-en or ml-ml):
+
+    GET  /health
+    GET  /metrics                  (Prometheus text; /metrics?format=json for JSON)
+    GET  /lookup?q=apple&direction=en-ml&limit=15
+    GET  /define?q=apple&direction=en-ml
+    GET  /suggest?q=app&direction=en-ml&limit=20
+    POST /batch   {"requests": [{"op": "define", "q": "apple", "direction": "en-ml"}, ...]}
+
+A batch answers up to MAX_BATCH requests in one round trip; its define
+requests are grouped per direction and run through define_many(). Errors
+come back as {"error": ...} (a whole request) or in place of one batch item.
+The server is read-only: restart it to pick up changed workbooks. Workers
+need os.fork(); elsewhere a single process serves. /health and /metrics
+describe the worker that answers; each worker keeps its own metrics.
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from dictionary_engine import DIRECTIONS, DictionaryEngine
+from dictionary_index import SUGGESTION_LIMIT
+from dictionary_snapshot import SNAPSHOT_DIR
+
+DEFAULT_PORT = 8080
+DEFAULT_LIMIT = 15      # related words per lookup, as in the web app
+MAX_LIMIT = 200
+MAX_QUERY_LENGTH = 200
+MAX_BATCH = 1000        # requests per /batch call
+MAX_BODY = 1 << 20      # bytes
+BACKLOG = 1024
+
+ENML_PATH = SNAPSHOT_DIR / "en_ml.xlsx"
+MLML_PATH = SNAPSHOT_DIR / "datukexcel.xlsx"
+
+OPS = ("lookup", "define", "suggest")
+
+REQUEST_SECONDS = metrics.histogram("server_request_seconds",
+                                    "HTTP requests answered, by endpoint", ("endpoint",))
+REQUEST_ERRORS = metrics.counter("server_request_errors_total",
+                                 "HTTP requests answered with an error, by endpoint",
+                                 ("endpoint",))
+BATCH_ITEMS = metrics.counter("server_batch_items_total", "Requests answered inside /batch calls")
+
+
+# --- Operations ---
+
+def _direction(params):
+    direction = params.get("direction") or "en-ml"
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unknown direction: {direction}")
+    return direction
+
+
+def _query(params):
+    query = params.get("q")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("Missing query 'q'")
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValueError(f"Query longer than {MAX_QUERY_LENGTH} characters")
+    return query
+
+
+def _limit(params, default):
+    try:
+        limit = int(params.get("limit", default))
+    except (TypeError, ValueError):
+        raise ValueError("'limit' must be an integer") from None
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def run_op(engine, op, params):
+    """One lookup, define or suggest request as a JSON-ready dict."""
+    direction, query = _direction(params), _query(params)
+    if op == "lookup":
+        results = engine.lookup(direction, query, _limit(params, DEFAULT_LIMIT))
+        return {"suggestions": results.suggestions,
+                "exact": [{"word": word, "translation": translation}
+                          for word, translation in results.exact],
+                "related": [{"word": word, "translation": translation}
+                            for word, translation in results.related],
+                "related_count": results.related_count}
+    if op == "define":
+        headword, translations = engine.define(direction, query)
+        return {"headword": headword, "translations": list(translations)}
+    if op == "suggest":
+        return {"suggestions": engine.suggest(direction, query,
+                                              _limit(params, SUGGESTION_LIMIT))}
+    raise ValueError(f"Unknown op: {op}")
+
+
+def run_batch(engine, requests):
+    """
+    Answer a list of {"op", "q", "direction", "limit"} requests.
+    Returns: one result (or {"error": ...}) per request, in order
+    """
+    results = [None] * len(requests)
+    defines = {}  # direction -> [(position, query), ...]
+    for position, params in enumerate(requests):
+        try:
+            if not isinstance(params, dict):
+                raise ValueError("Each request must be an object")
+            op = params.get("op", "lookup")
+            if op == "define":
+                defines.setdefault(_direction(params), []).append((position, _query(params)))
+            else:
+                results[position] = run_op(engine, op, params)
+        except ValueError as e:
+            results[position] = {"error": str(e)}
+    for direction, items in defines.items():
+        definitions = engine.define_many(direction, [query for _, query in items])
+        for (position, _), (headword, translations) in zip(items, definitions):
+            results[position] = {"headword": headword, "translations": list(translations)}
+    return results
+
+
+# --- HTTP ---
+
+class LookupHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse connections
+    # Headers and body go out as separate writes; with Nagle's algorithm the
+    # body would wait for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    server_version = "MalayalamDictionary/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send(200, self.server.health())
+            return
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == "/metrics":
+            if params.get("format") == "json":
+                self._send(200, metrics.snapshot())
+            else:
+                self._send_text(200, metrics.render_prometheus(),
+                                "text/plain; version=0.0.4; charset=utf-8")
+            return
+        op = url.path.strip("/")
+        if op not in OPS:
+            self._send(404, {"error": f"Unknown endpoint: {url.path}"})
+            return
+        self._answer(op, lambda: run_op(self.server.engine, op, params))
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/batch":
+            self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if not 0 < length <= MAX_BODY:
+            self.close_connection = True
+            self._send(413 if length > MAX_BODY else 400, {"error": "Bad request body"})
+            return
+        body = self.rfile.read(length)
+
+        def batch():
+            try:
+                requests = json.loads(body)["requests"]
+            except (ValueError, KeyError, TypeError):
+                raise ValueError('Expected {"requests": [...]}') from None
+            if not isinstance(requests, list) or len(requests) > MAX_BATCH:
+                raise ValueError(f"'requests' must be a list of at most {MAX_BATCH}")
+            BATCH_ITEMS.inc(len(requests))
+            return {"results": run_batch(self.server.engine, requests)}
+
+        self._answer("batch", batch)
+
+    def _answer(self, endpoint, work):
+        with REQUEST_SECONDS.labels(endpoint).time():
+            try:
+                payload = work()
+            except ValueError as e:
+                REQUEST_ERRORS.labels(endpoint).inc()
+                self._send(400, {"error": str(e)})
+                return
+            self.server.requests += 1
+            self._send(200, payload)
+
+    def _send(self, status, payload):
+        self._send_text(status, json.dumps(payload, ensure_ascii=False),
+                        "application/json; charset=utf-8")
+
+    def _send_text(self, status, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class LookupServer(ThreadingHTTPServer):
+    """One worker: serves the shared engine on an already listening socket."""
+
+    daemon_threads = True
+
+    def __init__(self, sock, engine, worker=0, verbose=False):
+        super().__init__(sock.getsockname()[:2], LookupHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.engine = engine
+        self.worker = worker
+        self.verbose = verbose
+        self.requests = 0  # approximate under threads; for /health only
+        self.started = time.time()
+
+    def health(self):
+        return {"status": "ok", "worker": self.worker, "pid": os.getpid(),
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "rows": {direction: self.engine.size(direction) for direction in DIRECTIONS},
+                "memory_mb": metrics.memory_mb()}
+
+
+def _run_worker(sock, engine, worker, verbose):
+    server = LookupServer(sock, engine, worker, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def prepare(engine):
+    """Build everything lazily built (typo indexes) and freeze the heap before forking."""
+    for index in engine.indexes.values():
+        index.prepare_fuzzy()
+    # Objects that survive to here are permanent: keep the collector from
+    # touching (and so copying) their pages in every worker
+    gc.collect()
+    gc.freeze()
+
+
+def serve(engine, host="127.0.0.1", port=DEFAULT_PORT, workers=1, verbose=False, ready=None):
+    """
+    Serve ``engine`` until interrupted, from ``workers`` forked processes.
+    ``ready`` is called with the bound (host, port) once the socket listens.
+    """
+    prepare(engine)
+    sock = socket.create_server((host, port), backlog=BACKLOG)
+    if ready is not None:
+        ready(sock.getsockname()[:2])
+    if workers <= 1 or not hasattr(os, "fork"):
+        _run_worker(sock, engine, 0, verbose)
+        return
+
+    children = {}  # pid -> worker number
+    stopping = False
+
+    def spawn(worker):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _run_worker(sock, engine, worker, verbose)
+            finally:
+                os._exit(0)
+        children[pid] = worker
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    for worker in range(workers):
+        spawn(worker)
+    try:
+        while children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            worker = children.pop(pid, None)
+            if worker is not None and not stopping:
+                print(f"Worker {worker} (pid {pid}) exited; restarting", file=sys.stderr)
+                spawn(worker)
+    except KeyboardInterrupt:
+        stop(signal.SIGINT, None)
+        for pid in list(children):
+            os.waitpid(pid, 0)
+    finally:
+        sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dictionary lookup HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--enml", default=str(ENML_PATH), help="English-Malayalam workbook")
+    parser.add_argument("--mlml", default=str(MLML_PATH), help="Malayalam-Malayalam workbook")
+    parser.add_argument("--sqlite", help="serve a compiled dictionary database instead")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        engine = DictionaryEngine.open_sqlite(args.sqlite)
+    else:
+        engine = DictionaryEngine.load(args.enml, args.mlml)
+    serve(engine, args.host, args.port, args.workers, args.verbose,
+          ready=lambda address: print(f"Serving on http://{address[0]}:{address[1]} "
+                                      f"with {args.workers} worker(s)", flush=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Compiled binary snapshots of the dictionary sheets.
+
+Parsing .xlsx files with openpyxl dominates a cold start, so each sheet is
+compiled once into a small columnar file under ``.cache_data`` and later
+starts read that instead. A snapshot is rebuilt only when the SHA-256 of its
+source workbook changes.
+
+Layout (little endian)::
+
+    header   magic, format version, source sha256, source size,
+             source mtime_ns, row count
+    columns  (offset, length) of each column blob
+    blobs    one UTF-8 blob per column, cells separated by NUL
+
+Cells read from .xlsx can never contain NUL, so the separator is safe and a
+whole column decodes with a single ``bytes.decode().split()``.
+"""
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import pandas as pd
+
+SNAPSHOT_DIR = Path(".cache_data")
+SNAPSHOT_SUFFIX = ".mldict"
+COLUMNS = ("from_content", "to_content")
+
+_MAGIC = b"MLDICT\x00\x00"
+_VERSION = 1
+_HEADER = struct.Struct("<8sI32sQqQ")
+_COLUMN = struct.Struct("<QQ")
+_SEPARATOR = "\x00"
+
+
+def snapshot_path_for(source_path, snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot file used for ``source_path``."""
+    return Path(snapshot_dir) / (Path(source_path).stem + SNAPSHOT_SUFFIX)
+
+
+def file_sha256(path):
+    """SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def read_sheet(source_path, name=None):
+    """Parse and clean a dictionary workbook (the slow openpyxl path)."""
+    df = pd.read_excel(source_path)
+    if "from_content" not in df.columns or "to_content" not in df.columns:
+        raise ValueError(f"Sheet '{name or Path(source_path).name}' must have columns "
+                         "'from_content' and 'to_content'.")
+    df = df.loc[:, list(COLUMNS)].dropna().copy()
+    for col in COLUMNS:
+        df.loc[:, col] = df[col].astype(str).str.strip()
+    return df.reset_index(drop=True)
+
+
+def append_rows(source_path, pairs):
+    """
+    Append (from_content, to_content) rows the workbook does not have yet,
+    leaving its other columns, rows and formatting as they are (atomically).
+    Returns: the number of rows appended
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source_path)
+    sheet = workbook.worksheets[0]  # the one read_sheet() reads
+    header = [cell.value for cell in sheet[1]]
+    positions = [header.index(col) for col in COLUMNS]
+    existing = set()
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        cells = [row[i] if i < len(row) else None for i in positions]
+        if None not in cells:
+            existing.add(tuple(str(cell).strip() for cell in cells))
+    new = [pair for pair in dict.fromkeys(pairs) if pair not in existing]
+    if not new:
+        return 0
+    for pair in new:
+        row = [None] * (max(positions) + 1)
+        for i, value in zip(positions, pair):
+            row[i] = value
+        sheet.append(row)
+    tmp_path = f"{source_path}.tmp.xlsx"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, source_path)
+    return len(new)
+
+
+def write_snapshot(df, snapshot_path, source_path):
+    """Write ``df`` as the snapshot of ``source_path`` (atomically)."""
+    stat = os.stat(source_path)
+    blobs = [_SEPARATOR.join(df[col].tolist()).encode("utf-8") for col in COLUMNS]
+
+    offset = _HEADER.size + _COLUMN.size * len(COLUMNS)
+    table = b""
+    for blob in blobs:
+        table += _COLUMN.pack(offset, len(blob))
+        offset += len(blob)
+
+    header = _HEADER.pack(_MAGIC, _VERSION, file_sha256(source_path),
+                          stat.st_size, stat.st_mtime_ns, len(df))
+    snapshot_path = Path(snapshot_path)
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, snapshot_path)
+
+
+def _read_header(f):
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, digest, size, mtime_ns, rows = _HEADER.unpack(raw)
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    return digest, size, mtime_ns, rows
+
+
+def _is_current(header, snapshot_path, source_path):
+    """Whether a snapshot header still describes ``source_path``.
+
+    A matching size and mtime is trusted as is; otherwise the source is hashed
+    and, if only its timestamp moved, the header stamp is refreshed in place.
+    """
+    digest, size, mtime_ns, rows = header
+    stat = os.stat(source_path)
+    if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+        return True
+    if file_sha256(source_path) != digest:
+        return False
+    with open(snapshot_path, "r+b") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, digest, stat.st_size, stat.st_mtime_ns, rows))
+    return True
+
+
+def read_snapshot(snapshot_path, source_path=None):
+    """
+    Load a snapshot as a DataFrame.
+    Returns None when the file is missing, has an old format or (when
+    ``source_path`` is given) no longer matches the source workbook.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            header = _read_header(f)
+    except FileNotFoundError:
+        return None
+    if header is None:
+        return None
+    if source_path is not None and not _is_current(header, snapshot_path, source_path):
+        return None
+
+    rows = header[3]
+    data = {col: [] for col in COLUMNS}
+    if rows:
+        with open(snapshot_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i, col in enumerate(COLUMNS):
+                offset, length = _COLUMN.unpack_from(mm, _HEADER.size + i * _COLUMN.size)
+                data[col] = mm[offset:offset + length].decode("utf-8").split(_SEPARATOR)
+    return pd.DataFrame(data, columns=list(COLUMNS))
+
+
+def load_sheet(source_path, name=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load a cleaned dictionary sheet, compiling its snapshot when needed.
+    Returns a DataFrame with 'from_content' and 'to_content' columns.
+    """
+    snapshot_path = snapshot_path_for(source_path, snapshot_dir)
+    df = read_snapshot(snapshot_path, source_path)
+    if df is None:
+        df = read_sheet(source_path, name)
+        write_snapshot(df, snapshot_path, source_path)
+    return df
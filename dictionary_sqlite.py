@@ -0,0 +1,247 @@
+"""SQLite storage backend for very large dictionaries.
+
+The in-memory DictionaryIndex keeps every key, translation and substring
+posting resident, and has to load the whole sheet before the first lookup.
+This backend compiles the same sheets once into a SQLite database and reads
+it on demand, so opening it is instant and the resident set stays small:
+
+* exact / prefix - a B-tree index on the normalized key (prefix lookups are
+  range scans over [key, key + U+10FFFF)); form ids are the same static
+  ranks as in DictionaryIndex
+* contains       - an FTS5 table with the trigram tokenizer over the keys;
+  queries shorter than a trigram scan the keys in form order until the
+  limit is reached
+* fuzzy          - the usual FuzzyIndex, built from the keys on first use
+
+SqliteIndex answers the same tier methods as DictionaryIndex, so the engine,
+PrefixCursor and OverlayIndex (for words added later) work with it unchanged.
+Its prefix spans are the prefixes themselves rather than (lo, hi) slices, so
+callers pass spans back to the index that made them and never unpack them.
+"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from dictionary_fuzzy import FuzzyIndex
+from dictionary_index import (SUGGESTION_LIMIT, DictionaryIndex, normalize_key,
+                              normalize_malayalam_key, rank_forms)
+
+DATABASE_NAME = "dictionary.sqlite"
+SCHEMA_VERSION = 2
+MMAP_SIZE = 1 << 30  # bytes of the database to memory-map
+
+_MAX_CHAR = "\U0010ffff"
+_SEPARATOR = "\x00"
+
+# direction -> (table suffix, sheet, reverse, normalize)
+_DIRECTIONS = {
+    "en-ml": ("en_ml", "en_ml", False, normalize_key),
+    "ml-en": ("ml_en", "en_ml", True, normalize_malayalam_key),
+    "ml-ml": ("ml_ml", "ml_ml", False, normalize_key),
+}
+
+
+def _fill_direction(db, table, sources, targets, normalize, lookup_counts=None):
+    """Group and rank rows into forms (as DictionaryIndex does) and write one direction."""
+    grouped = {}
+    for source, target in zip(sources, targets):
+        grouped.setdefault(source, {})[target] = None
+    db.execute(f"CREATE TABLE forms_{table} (form INTEGER PRIMARY KEY, source TEXT NOT NULL,"
+               f" key TEXT NOT NULL, translations TEXT NOT NULL)")
+    db.executemany(f"INSERT INTO forms_{table} VALUES (?, ?, ?, ?)",
+                   ((form, source, key, _SEPARATOR.join(translations))
+                    for form, (source, translations, key)
+                    in enumerate(rank_forms(grouped, normalize, lookup_counts))))
+    db.execute(f"CREATE INDEX forms_{table}_key ON forms_{table} (key, form)")
+    db.execute(f"CREATE UNIQUE INDEX forms_{table}_source ON forms_{table} (source)")
+    db.execute(f"CREATE VIRTUAL TABLE grams_{table} USING fts5(key, content='forms_{table}',"
+               f" content_rowid='form', tokenize='trigram')")
+    db.execute(f"INSERT INTO grams_{table} (grams_{table}) VALUES ('rebuild')")
+    return len(grouped)
+
+
+def build_database(enml, mlml, db_path, source_token=None, lookup_counts=None):
+    """
+    Compile two cleaned sheets into a database at ``db_path`` (atomically).
+    ``source_token`` (any JSON value) is stored to tell when it is stale;
+    ``lookup_counts`` is as for DictionaryEngine.
+    """
+    lookup_counts = lookup_counts or {}
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    sheets = {"en_ml": enml, "ml_ml": mlml}
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        meta = {"schema": SCHEMA_VERSION, "source_token": source_token}
+        for direction, (table, sheet, reverse, normalize) in _DIRECTIONS.items():
+            df = sheets[sheet]
+            sources, targets = df["from_content"].tolist(), df["to_content"].tolist()
+            if reverse:
+                sources, targets = targets, sources
+            meta[f"forms_{table}"] = _fill_direction(db, table, sources, targets, normalize,
+                                                     lookup_counts.get(direction))
+            meta[f"rows_{table}"] = len(df)
+        db.executemany("INSERT INTO meta VALUES (?, ?)",
+                       ((name, json.dumps(value)) for name, value in meta.items()))
+        db.commit()
+    finally:
+        db.close()
+    os.replace(tmp_path, db_path)
+
+
+def database_token(db_path):
+    """The source token a database was built with, or None if unusable."""
+    try:
+        db = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        meta = dict(db.execute("SELECT name, value FROM meta"))
+        if json.loads(meta["schema"]) != SCHEMA_VERSION:
+            return None
+        return json.loads(meta["source_token"])
+    except (sqlite3.Error, KeyError, ValueError):
+        return None
+    finally:
+        db.close()
+
+
+class SqliteIndex:
+    """One direction of a dictionary database, with the DictionaryIndex tier API."""
+
+    def __init__(self, db_path, direction):
+        self.db_path = Path(db_path)
+        self.table, _, _, self.normalize = _DIRECTIONS[direction]
+        self._local = threading.local()  # one read-only connection per thread
+        meta = dict(self._db().execute("SELECT name, value FROM meta"))
+        self.rows = json.loads(meta[f"rows_{self.table}"])
+        self._form_count = json.loads(meta[f"forms_{self.table}"])
+        self._fuzzy = None
+        self._fuzzy_lock = threading.Lock()
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True,
+                                 check_same_thread=False)
+            # Read pages straight from the page cache, shared by every process
+            db.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            self._local.db = db
+        return db
+
+    def _forms(self, sql, *params):
+        return [form for form, in self._db().execute(sql.format(t=self.table), params)]
+
+    def __len__(self):
+        return self.rows
+
+    # --- Tiers ---
+
+    def exact_forms(self, key):
+        return self._forms("SELECT form FROM forms_{t} WHERE key = ? ORDER BY form", key)
+
+    def prefix_forms(self, key, limit=None):
+        # key > ? skips the exact key itself
+        return self._forms("SELECT form FROM forms_{t} WHERE key > ? AND key < ?"
+                           " ORDER BY form LIMIT ?", key, key + _MAX_CHAR,
+                           -1 if limit is None else limit)
+
+    def full_range(self):
+        return ""
+
+    def prefix_range(self, key, within=None):
+        # The "range" is the prefix itself; the key index does the narrowing
+        return key
+
+    def first_forms(self, span, limit):
+        return self._forms("SELECT form FROM forms_{t} WHERE key >= ? AND key < ?"
+                           " ORDER BY form LIMIT ?", span, span + _MAX_CHAR, limit)
+
+    def _contains_query(self, key, select):
+        """SQL and parameters for forms containing ``key``, ordered by form id."""
+        # instr() > 1: contains the key, but not at the start
+        if len(key) < 3:
+            return (f"SELECT {select} FROM forms_{{t}} f WHERE instr(f.key, ?) > 1"
+                    f" ORDER BY f.form", (key,))
+        # FTS5 yields rowids (= form ids) in order, so no sort is needed
+        return (f"SELECT {select} FROM grams_{{t}} g JOIN forms_{{t}} f ON f.form = g.rowid"
+                f" WHERE grams_{{t}} MATCH ? AND instr(f.key, ?) > 1 ORDER BY g.rowid",
+                (_phrase(key), key))
+
+    def contains_forms(self, key, limit=None):
+        sql, params = self._contains_query(key, "f.form")
+        return self._forms(sql + " LIMIT ?", *params, -1 if limit is None else limit)
+
+    def count_related(self, key):
+        sql, params = self._contains_query(key, "count(*)")
+        contains, = self._db().execute(sql.format(t=self.table), params).fetchone()
+        prefix, = self._db().execute(
+            f"SELECT count(*) FROM forms_{self.table} WHERE key > ? AND key < ?",
+            (key, key + _MAX_CHAR)).fetchone()
+        return prefix + contains
+
+    def prepare_fuzzy(self):
+        with self._fuzzy_lock:
+            if self._fuzzy is None:
+                # Distinct keys in form order, as DictionaryIndex feeds them
+                keys = [key for key, in self._db().execute(
+                    f"SELECT key FROM forms_{self.table} GROUP BY key ORDER BY min(form)")]
+                self._fuzzy = FuzzyIndex(keys)
+        return self._fuzzy
+
+    def fuzzy_forms(self, key, limit=SUGGESTION_LIMIT):
+        fuzzy = self._fuzzy or self.prepare_fuzzy()
+        forms = [form for key_id in fuzzy.lookup(key, limit)
+                 for form in self.exact_forms(fuzzy.keys[key_id])]
+        return forms[:limit]
+
+    # --- Forms ---
+
+    def _form_row(self, form, column):
+        row = self._db().execute(f"SELECT {column} FROM forms_{self.table} WHERE form = ?",
+                                 (form,)).fetchone()
+        if row is None:
+            raise IndexError(form)
+        return row[0]
+
+    def form_id(self, source):
+        row = self._db().execute(f"SELECT form FROM forms_{self.table} WHERE source = ?",
+                                 (source,)).fetchone()
+        return None if row is None else row[0]
+
+    def form_count(self):
+        return self._form_count
+
+    def form_key(self, form):
+        return self._form_row(form, "key")
+
+    def form_source(self, form):
+        return self._form_row(form, "source")
+
+    def translations(self, form):
+        return tuple(self._form_row(form, "translations").split(_SEPARATOR))
+
+    def has_pair(self, source, target):
+        form = self.form_id(source)
+        return form is not None and target in self.translations(form)
+
+    # Search runs the tiers above exactly as it does on an in-memory index
+    search = DictionaryIndex.search
+
+
+def _phrase(key):
+    """FTS5 phrase query matching ``key`` as a substring (trigram tokenizer)."""
+    return '"' + key.replace('"', '""') + '"'
+
+
+def open_database(db_path):
+    """{direction: SqliteIndex} for a database built by build_database()."""
+    return {direction: SqliteIndex(db_path, direction) for direction in _DIRECTIONS}
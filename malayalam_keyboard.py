@@ -0,0 +1,29 @@
+"""Malayalam on-screen keyboard for the web app, typed in the browser.
+
+The keyboard is a Streamlit component (components/malayalam_keyboard,
+plain HTML and JavaScript, no build step) that edits its own text box
+client-side and reports the text back only once typing pauses, or at once on
+Enter / 🔍. A word typed on it therefore costs one script run, not one per
+key press as with a grid of st.button widgets.
+"""
+from pathlib import Path
+
+import streamlit.components.v1 as components
+
+DEBOUNCE_MS = 800  # pause in typing before the text is sent to the app
+
+_component = components.declare_component(
+    "malayalam_keyboard",
+    path=str(Path(__file__).resolve().parent / "components" / "malayalam_keyboard"))
+
+
+def malayalam_keyboard(value, layout, key, on_change=None, debounce_ms=DEBOUNCE_MS):
+    """
+    Render the keyboard over ``value`` with keys from ``layout`` (rows of characters).
+    ``value`` replaces the keyboard's text only when it changes between runs,
+    so a rerun never overwrites what is being typed.
+    Returns: the last text sent back by the keyboard (``value`` until then);
+    ``on_change`` is called before the rerun a new text triggers, like other widgets
+    """
+    return _component(value=value, layout=layout, debounce_ms=debounce_ms,
+                      key=key, on_change=on_change, default=value)
@@ -0,0 +1,359 @@
+"""In-process metrics: counters, gauges and latency histograms.
+
+The load and lookup paths record into module-level metrics declared where
+they are used:
+
+    LOOKUP_SECONDS = metrics.histogram("dictionary_lookup_seconds",
+                                       "Engine lookups", ("direction",))
+    with LOOKUP_SECONDS.labels(direction).time():
+        ...
+
+and the current values can be read back as Prometheus text
+(render_prometheus(), served by dictionary_server at /metrics) or as a
+JSON-ready dict with estimated percentiles (snapshot(), shown in the web
+app's statistics panel).
+
+Recording is a lock and a few additions. With DICTIONARY_METRICS=0 in the
+environment (read at import), every metric is a shared no-op object instead,
+so instrumented code pays one method call that does nothing. Metrics are per
+process: each forked server worker reports its own.
+"""
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+ENABLED = os.environ.get("DICTIONARY_METRICS", "1").lower() not in ("0", "false", "no", "off")
+
+# Upper bounds in seconds, from 50 µs (an index hit) to a minute (a cold load)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+# --- Metric values ---
+
+class _Counter:
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def sample(self):
+        return self.value
+
+
+class _Gauge:
+    """A value that is set, or read from a function when exported."""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Export ``function()`` instead of the set value (e.g. a current size)."""
+        self._function = function
+
+    def sample(self):
+        if self._function is not None:
+            try:
+                return self._function()
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class _Timer:
+    """Observes the seconds spent in a with-block, or between laps."""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+    def lap(self, *labels):
+        """Observe the time since the previous lap into ``histogram.labels(*labels)``."""
+        now = time.perf_counter()
+        self._histogram.labels(*labels).observe(now - self._start)
+        self._start = now
+
+
+class _Histogram:
+    """Counts of observations per bucket, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self):
+        """Context manager observing its duration."""
+        return _Timer(self)
+
+    def sample(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q, counts=None, count=None):
+        """Estimated ``q`` quantile: the upper bound of the bucket it falls in."""
+        if counts is None:
+            counts, count, _ = self.sample()
+        if not count:
+            return 0.0
+        rank, seen = q * count, 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+# --- Families (a metric and its labeled children) ---
+
+class Metric:
+    """A named metric; with label names, one child per combination of values."""
+
+    def __init__(self, name, help, labelnames, make):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._make = make
+        self._lock = threading.Lock()
+        self._children = {}
+        self._unlabeled = None if self.labelnames else make()
+        self.kind = (self._unlabeled or make()).kind
+
+    def labels(self, *values):
+        """The child for these label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    # Stored under the values as given, exported as strings
+                    child = self._children[values] = self._make()
+        return child
+
+    def children(self):
+        """(label dict, child) pairs in creation order."""
+        if self._unlabeled is not None:
+            return [({}, self._unlabeled)]
+        with self._lock:
+            items = list(self._children.items())
+        return [({name: str(value) for name, value in zip(self.labelnames, values)}, child)
+                for values, child in items]
+
+    # An unlabeled metric records directly
+    def inc(self, amount=1):
+        self._unlabeled.inc(amount)
+
+    def set(self, value):
+        self._unlabeled.set(value)
+
+    def set_function(self, function):
+        self._unlabeled.set_function(function)
+
+    def observe(self, value):
+        self._unlabeled.observe(value)
+
+    def time(self):
+        return self._unlabeled.time()
+
+    def timer(self):
+        """A timer whose lap(*labels) observes into this metric's children."""
+        return _Timer(self)
+
+
+class _NullMetric:
+    """Stands in for every metric, child and timer when metrics are disabled."""
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_function(self, function):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def time(self):
+        return self
+
+    def timer(self):
+        return self
+
+    def lap(self, *labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_METRIC = _NullMetric()
+
+_registry = {}  # name -> Metric
+_registry_lock = threading.Lock()
+
+
+def _register(name, help, labelnames, make):
+    if not ENABLED:
+        return NULL_METRIC
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Metric(name, help, labelnames, make)
+        return metric
+
+
+def counter(name, help, labelnames=()):
+    return _register(name, help, labelnames, _Counter)
+
+
+def gauge(name, help, labelnames=()):
+    return _register(name, help, labelnames, _Gauge)
+
+
+def histogram(name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+    return _register(name, help, labelnames, lambda: _Histogram(buckets))
+
+
+# --- Process gauges ---
+
+def memory_mb():
+    """Resident and private (unshared) memory of this process in MB, where /proc has it."""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return usage
+    kb = {name: int(value.split()[0]) for name, value in fields.items()
+          if value.strip().endswith("kB")}
+    usage["rss"] = round(kb.get("Rss", 0) / 1024, 1)
+    usage["private"] = round((kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024, 1)
+    return usage
+
+
+PROCESS_MEMORY = gauge("process_memory_mb", "Memory of this process", ("kind",))
+PROCESS_MEMORY.labels("rss").set_function(lambda: memory_mb().get("rss", math.nan))
+PROCESS_MEMORY.labels("private").set_function(lambda: memory_mb().get("private", math.nan))
+PROCESS_UPTIME = gauge("process_uptime_seconds", "Seconds since this process imported metrics")
+PROCESS_UPTIME.set_function(lambda start=time.time(): round(time.time() - start, 1))
+
+
+# --- Export ---
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, child in metric.children():
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_format_labels(labels)} "
+                             f"{_format_value(child.sample())}")
+                continue
+            counts, count, total = child.sample()
+            cumulative = 0
+            for bound, n in zip(child.buckets + (math.inf,), counts):
+                cumulative += n
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f"{metric.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """
+    Every metric as a JSON-ready dict.
+    Returns: {name: {"type", "help", "samples": [{"labels", "value"}, ...]}}, with None
+    for a value that is not finite; a histogram sample has count, sum_s, mean_ms and p50_ms / p90_ms / p99_ms instead
+    """
+    result = {}
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        samples = []
+        for labels, child in metric.children():
+            if metric.kind != "histogram":
+                value = child.sample()
+                # NaN (a failed or unavailable reading) and infinities are not JSON
+                if isinstance(value, float) and not math.isfinite(value):
+                    value = None
+                samples.append({"labels": labels, "value": value})
+                continue
+            counts, count, total = child.sample()
+            sample = {"labels": labels, "count": count, "sum_s": round(total, 6),
+                      "mean_ms": round(1000 * total / count, 3) if count else 0.0}
+            for q in QUANTILES:
+                value = child.quantile(q, counts, count)
+                # Beyond the last bucket there is no bound to report
+                sample[f"p{round(q * 100)}_ms"] = (round(1000 * value, 3)
+                                                   if math.isfinite(value) else None)
+            samples.append(sample)
+        result[metric.name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+    return result
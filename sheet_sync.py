@@ -0,0 +1,177 @@
+"""Conditional, resumable downloads of the dictionary workbooks.
+
+Each cached workbook gets a ``<name>.sync.json`` file beside it holding the
+server validators (ETag / Last-Modified), the sha256 of the content and the
+time of the last check. A sync sends a conditional request, so an unchanged
+sheet costs one 304 response. A changed body is streamed to ``<name>.part``,
+hashed, and moved into place atomically only if its content differs. An
+interrupted download is resumed with a Range request when the server
+supports it.
+
+Failed checks are recorded too: after ``n`` failures in a row the next
+attempt waits RETRY_BACKOFF * 2**(n-1) seconds (at most the sync interval),
+so an offline app keeps serving its cached copy instead of blocking on the
+network timeouts again on every rerun.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+SHEET_EXPORT_URL = "https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx"
+SYNC_INTERVAL = 900        # seconds between checks of the same sheet
+RETRY_BACKOFF = 30         # seconds before the first retry of a failed check
+TIMEOUT = (10, 30)         # connect / read timeouts in seconds
+CHUNK_SIZE = 1 << 16
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path):
+    with _locks_guard:
+        return _locks.setdefault(str(Path(path).resolve()), threading.Lock())
+
+
+def meta_path_for(target_path):
+    target_path = Path(target_path)
+    return target_path.with_name(target_path.name + ".sync.json")
+
+
+def read_meta(target_path):
+    try:
+        return json.loads(meta_path_for(target_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_meta(target_path, meta):
+    path = meta_path_for(target_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest
+
+
+def retry_delay(failures, interval=SYNC_INTERVAL):
+    """Seconds to wait after ``failures`` failed checks in a row."""
+    return min(interval, RETRY_BACKOFF * 2 ** (failures - 1))
+
+
+def sync_sheet(url, target_path, interval=SYNC_INTERVAL, session=None):
+    """
+    Bring ``target_path`` up to date with ``url``.
+    Checks at most once per ``interval`` seconds while a copy exists, and
+    backs off after failed checks.
+    Returns True if the file content changed.
+    Raises requests.RequestException or RuntimeError on a failed download,
+    or RuntimeError while backing off with no copy to serve.
+    """
+    target_path = Path(target_path)
+    with _lock_for(target_path):
+        meta = read_meta(target_path)
+        if meta.get("url") != url:
+            meta = {"url": url}
+        since = time.time() - meta.get("checked", 0)
+        failures = meta.get("failures", 0)
+        wait = retry_delay(failures, interval) if failures else interval
+        if since < wait:
+            if target_path.exists():
+                return False
+            if failures:
+                raise RuntimeError(f"{meta.get('error')} (retrying in {wait - since:.0f} s)")
+        try:
+            return _download(url, target_path, meta, session)
+        except (requests.RequestException, RuntimeError, OSError) as e:
+            meta.update(checked=time.time(), failures=failures + 1, error=str(e))
+            write_meta(target_path, meta)
+            raise
+
+
+def _download(url, target_path, meta, session):
+    """One conditional (or resumed) request; updates ``meta`` on success."""
+    part_path = target_path.with_name(target_path.name + ".part")
+    headers = {}
+    resume_from = 0
+    partial = meta.get("partial")
+    if partial and part_path.exists():
+        # Resume only if the server still has the same version (If-Range)
+        resume_from = part_path.stat().st_size
+        headers["Range"] = f"bytes={resume_from}-"
+        headers["If-Range"] = partial
+    elif target_path.exists():
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    http = session or requests
+    with http.get(url, headers=headers, stream=True, allow_redirects=True,
+                  timeout=TIMEOUT) as resp:
+        if resp.status_code == 304:
+            meta.update(checked=time.time(), failures=0, error=None)
+            write_meta(target_path, meta)
+            return False
+        if resp.status_code not in (200, 206):
+            raise RuntimeError(f"Download error for {url}: HTTP {resp.status_code}")
+
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if resp.status_code == 206:
+            digest = _file_sha256(part_path)
+            mode = "ab"
+        else:
+            digest = hashlib.sha256()
+            mode = "wb"
+        # Remember which version the partial file belongs to before writing it
+        meta["partial"] = etag or last_modified
+        write_meta(target_path, meta)
+        with open(part_path, mode) as f:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+    sha256 = digest.hexdigest()
+    previous = meta.get("sha256")
+    if previous is None and target_path.exists():
+        # A copy cached before syncing existed: compare by content
+        previous = _file_sha256(target_path).hexdigest()
+    changed = sha256 != previous
+    if changed:
+        os.replace(part_path, target_path)
+    else:
+        part_path.unlink()
+    meta.update(etag=etag, last_modified=last_modified, sha256=sha256,
+                checked=time.time(), partial=None, failures=0, error=None)
+    write_meta(target_path, meta)
+    return changed
+
+
+def sync_sheets(jobs, interval=SYNC_INTERVAL):
+    """
+    Sync several (url, target_path) pairs concurrently.
+    Returns: {target_path: True if changed, False if unchanged, or the exception raised}
+    """
+    def run(job):
+        url, target_path = job
+        try:
+            return sync_sheet(url, target_path, interval)
+        except (requests.RequestException, RuntimeError, OSError) as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+        return {target: result for (_, target), result in zip(jobs, pool.map(run, jobs))}
@@ -2,12 +2,28 @@ import streamlit as st
 import pandas as pd
 import json
 import os
-import requests
 from datetime import datetime
 from pathlib import Path
 import io
+import tempfile
 import base64
+import re
+import threading
 import time
+import uuid
+import weakref
+
+import metrics
+from dictionary_async import CoalescingLookup
+from dictionary_engine import DictionaryEngine
+from batch_translate import translate_file
+from dictionary_journal import WordJournal
+from dictionary_sqlite import DATABASE_NAME, build_database, database_token
+from dictionary_snapshot import load_sheet
+from malayalam_keyboard import malayalam_keyboard
+from sheet_sync import SHEET_EXPORT_URL, sync_sheets
+from transliteration import Transliterator
+from user_store import PAGE_SIZE, UserStore
 
 # Page configuration
 st.set_page_config(
@@ -30,63 +46,180 @@ except Exception:
     # FALLBACK ID - Use the actual ID if the app is not deployed with secrets
     MLML_SHEET_ID = "1UW8H2Kma8TNoREZ5ohnC1lV87laotTGW"
 
+# Export URL template; point it at a local HTTP server to test syncing
+try:
+    SHEET_URL_TEMPLATE = st.secrets["SHEET_EXPORT_URL"]
+except Exception:
+    SHEET_URL_TEMPLATE = os.environ.get("SHEET_EXPORT_URL", SHEET_EXPORT_URL)
+
+# "memory" keeps the sheets and indexes in RAM; "sqlite" compiles them into
+# a database on disk and reads it on demand (for very large sheets)
+try:
+    DICTIONARY_BACKEND = st.secrets["DICTIONARY_BACKEND"]
+except Exception:
+    DICTIONARY_BACKEND = os.environ.get("DICTIONARY_BACKEND", "memory")
+
 # Local cache
 CACHE_DIR = Path(".cache_data")
 CACHE_DIR.mkdir(exist_ok=True)
 ENML_CACHE = CACHE_DIR / "en_ml.xlsx"
 MLML_CACHE = CACHE_DIR / "datukexcel.xlsx"
 
-def download_sheet_as_xlsx(sheet_id: str, target_path: Path):
-    if target_path.exists():
-        return
-    export_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx"
-    try:
-        resp = requests.get(export_url, allow_redirects=True, timeout=30)
-    except Exception as e:
-        st.error(f"Network error downloading sheet {sheet_id}: {e}")
-        raise
-    if resp.status_code != 200:
-        st.error(f"Failed to download sheet {sheet_id}: HTTP {resp.status_code}")
-        raise RuntimeError(f"Download error for sheet {sheet_id}")
-    target_path.write_bytes(resp.content)
+# Seconds between sheet sync attempts of this process (sheet_sync itself
+# checks each sheet at most every 15 minutes and backs off after failures)
+SYNC_CHECK_SECONDS = 60
 
-def load_data_uncached():
-    # Only download if not present
-    if not ENML_CACHE.exists():
-        download_sheet_as_xlsx(ENML_SHEET_ID, ENML_CACHE)
-    if not MLML_CACHE.exists():
-        download_sheet_as_xlsx(MLML_SHEET_ID, MLML_CACHE)
+# Span over which the statistics panel measures the current rerun rate
+RATE_WINDOW_SECONDS = 60
 
-    enml = pd.read_excel(ENML_CACHE)
-    mlml = pd.read_excel(MLML_CACHE)
+# Related words shown as suggestion chips; only these many are built per search
+MAX_SUGGESTION_CHIPS = 15
 
-    for df, name in [(enml, "English-Malayalam"), (mlml, "Malayalam-Malayalam")]:
-        # Note: Assuming 'from_content' and 'to_content' are the standard column names
-        if "from_content" not in df.columns or "to_content" not in df.columns:
-            st.error(f"Sheet '{name}' must have columns 'from_content' and 'to_content'.")
-            raise ValueError(f"Missing required columns in {name} sheet")
+# Radio labels -> dictionary engine directions
+DIRECTION_KEYS = {
+    "English → മലയാളം": "en-ml",
+    "മലയാളം → English": "ml-en",
+    "മലയാളം → മലയാളം": "ml-ml",
+}
 
-    enml = enml.loc[:, ["from_content", "to_content"]].dropna().copy()
-    mlml = mlml.loc[:, ["from_content", "to_content"]].dropna().copy()
+APP_RERUNS = metrics.counter("app_reruns_total", "Script runs (one per interaction)")
+APP_LOAD_SECONDS = metrics.histogram("app_load_seconds",
+                                     "Loading steps: sheet sync, parsing, engine build", ("stage",))
+APP_SEARCH_SECONDS = metrics.histogram("app_search_seconds",
+                                       "search_dictionary calls, cached or not", ("direction",))
+APP_CACHE_CALLS = metrics.counter("app_cache_calls_total",
+                                  "Calls of st.cache_resource functions", ("cache",))
+APP_CACHE_MISSES = metrics.counter("app_cache_misses_total",
+                                   "Calls that ran the cached function", ("cache",))
+LOOKUP_CACHE = metrics.gauge("app_lookup_cache", "Shared lookup cache counters", ("stat",))
 
-    enml.loc[:, "from_content"] = enml["from_content"].astype(str).str.strip()
-    enml.loc[:, "to_content"] = enml["to_content"].astype(str).str.strip()
-    mlml.loc[:, "from_content"] = mlml["from_content"].astype(str).str.strip()
-    mlml.loc[:, "to_content"] = mlml["to_content"].astype(str).str.strip()
+def ensure_sheets_downloaded():
+    """Refresh both cached workbooks from Google Sheets (conditionally, in parallel)"""
+    jobs = [(SHEET_URL_TEMPLATE.format(sheet_id=sheet_id), path)
+            for sheet_id, path in [(ENML_SHEET_ID, ENML_CACHE), (MLML_SHEET_ID, MLML_CACHE)]]
+    for (url, path), result in zip(jobs, sync_sheets(jobs).values()):
+        if not isinstance(result, Exception):
+            continue
+        if path.exists():
+            # Keep serving the cached copy; the next check will retry
+            st.warning(f"Could not refresh {path.name}, using the cached copy: {result}")
+        else:
+            st.error(f"Failed to download sheet {url}: {result}")
+            raise result
+
+def load_data_uncached():
+    # Parsed sheets are compiled into snapshots next to the cached workbooks
+    # and only re-parsed when a workbook's content changes
+    sheets = []
+    for path, name in [(ENML_CACHE, "English-Malayalam"), (MLML_CACHE, "Malayalam-Malayalam")]:
+        try:
+            with APP_LOAD_SECONDS.labels("parse").time():
+                sheets.append(load_sheet(path, name, snapshot_dir=CACHE_DIR))
+        except ValueError as e:
+            st.error(str(e))
+            raise
 
+    enml, mlml = sheets
     return enml, mlml
 
-def save_enml(df: pd.DataFrame):
+def source_stamp():
+    """Size and modification time of both cached workbooks"""
+    return tuple((path.stat().st_size, path.stat().st_mtime_ns) for path in (ENML_CACHE, MLML_CACHE))
+
+# One engine per process, shared read-only by every session and rerun
+@st.cache_resource(show_spinner="Loading dictionary...")
+def build_dictionary_engine():
+    """Build the search engine from the cached workbooks"""
+    APP_CACHE_MISSES.labels("engine").inc()
+    stamp = source_stamp()
+    enml, mlml = load_data_uncached()
+    engine = DictionaryEngine(enml, mlml)
+    engine.source_token = stamp
+    # Added words are journaled and folded into the snapshots in the
+    # background; the workbooks themselves mirror Google Sheets and stay as is
+    engine.attach_journal(WordJournal(CACHE_DIR / "additions.journal"),
+                          {"en_ml": (ENML_CACHE, CACHE_DIR, False),
+                           "ml_ml": (MLML_CACHE, CACHE_DIR, False)})
+    engine.warm_up()
+    return engine
+
+@st.cache_resource(show_spinner="Loading dictionary...", max_entries=1)
+def open_sqlite_engine(stamp):
+    """Search engine over the SQLite database, recompiled when a workbook changes"""
+    APP_CACHE_MISSES.labels("engine").inc()
+    db_path = CACHE_DIR / DATABASE_NAME
+    token = json.loads(json.dumps(stamp))  # as stored in the database
+    if database_token(db_path) != token:
+        enml, mlml = load_data_uncached()
+        with APP_LOAD_SECONDS.labels("sqlite_build").time():
+            build_database(enml, mlml, db_path, token)
+    engine = DictionaryEngine.open_sqlite(db_path)
+    engine.source_token = stamp
+    # Added words are replayed from the journal over the database
+    engine.attach_journal(WordJournal(CACHE_DIR / "additions.journal"), {})
+    engine.warm_up()
+    return engine
+
+# When this process last synced the sheets, shared by every session
+@st.cache_resource
+def sync_schedule():
+    return {"next": 0.0, "lock": threading.Lock()}
+
+def sync_sheets_if_due():
+    """Sync the workbooks at most once per SYNC_CHECK_SECONDS, not on every rerun"""
+    schedule = sync_schedule()
+    cached = ENML_CACHE.exists() and MLML_CACHE.exists()
+    if cached and time.monotonic() < schedule["next"]:
+        return
+    # With cached copies to serve, a session never waits for another one's sync
+    if not schedule["lock"].acquire(blocking=not cached):
+        return
     try:
-        df.to_excel(ENML_CACHE, index=False)
-    except Exception as e:
-        st.error(f"Could not save English-Malayalam dictionary locally: {e}")
+        if cached and time.monotonic() < schedule["next"]:
+            return  # another session synced while this one waited
+        try:
+            with APP_LOAD_SECONDS.labels("sheet_sync").time():
+                ensure_sheets_downloaded()
+        finally:
+            schedule["next"] = time.monotonic() + SYNC_CHECK_SECONDS
+    finally:
+        schedule["lock"].release()
 
-# Load data with caching
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_dictionary_data():
-    """Load dictionary data from Google Sheets with caching"""
-    return load_data_uncached()
+def load_dictionary_engine():
+    """The shared search engine, updated in place when a workbook changes"""
+    # A sync that changes a workbook changes its stamp, which triggers one reload
+    sync_sheets_if_due()
+    APP_CACHE_CALLS.labels("engine").inc()
+    with APP_LOAD_SECONDS.labels("engine").time():
+        if DICTIONARY_BACKEND == "sqlite":
+            return open_sqlite_engine(source_stamp())
+        engine = build_dictionary_engine()
+        # Only the changed rows are applied; other sessions keep reading the
+        # previous index version until the new one is swapped in
+        engine.reload(source_stamp(), load_data_uncached)
+    return engine
+
+# Sessions typing the same query share one computation and its cached result
+@st.cache_resource(max_entries=2)
+def shared_lookups(_engine, engine_id):
+    """Coalescing result cache over one engine, emptied when its indexes change"""
+    lookups = CoalescingLookup(_engine)
+    ref = weakref.ref(lookups)
+    for stat in ("hits", "coalesced", "misses", "entries", "evictions", "invalidations"):
+        LOOKUP_CACHE.labels(stat).set_function(
+            lambda stat=stat: ref().stats()[stat] if ref() else 0)
+    return lookups
+
+@st.cache_resource(max_entries=2)
+def shared_transliterator(_engine, engine_id):
+    """Manglish → Malayalam headwords of one engine"""
+    return Transliterator(_engine)
+
+# History and favorites of every user, kept on disk across sessions
+@st.cache_resource
+def user_store():
+    """Shared persistent history/favorites store"""
+    return UserStore(CACHE_DIR / "user_data.sqlite")
 
 # --- JAVASCRIPT FOR CLIPBOARD COPY ---
 def copy_to_clipboard_js(text):
@@ -156,6 +289,7 @@ st.markdown("""
         border-radius: 15px;
         box-shadow: 0 4px 12px rgba(0,150,136,0.3);
         animation: glow 2s ease-in-out infinite alternate;
+        display: grid;
     }
     
     @keyframes glow {
@@ -163,6 +297,21 @@ st.markdown("""
         to { box-shadow: 0 8px 24px rgba(0,150,136,0.6); }
     }
     
+    /* Both titles share one grid cell and take turns every 4 seconds */
+    .header-title {
+        grid-area: 1 / 1;
+        animation: header-swap 8s step-end infinite;
+    }
+    
+    .header-title-en {
+        animation-delay: -4s;
+    }
+    
+    @keyframes header-swap {
+        0% { opacity: 1; }
+        50% { opacity: 0; }
+    }
+    
     .search-result-card-container {
         background: linear-gradient(135deg, var(--card-bg) 0%, var(--bg-color) 100%);
         padding: 20px;
@@ -307,12 +456,11 @@ st.markdown("""
 # Initialize session state
 def init_session_state():
     defaults = {
-        'search_history': [],
-        'favorites': [],
-        'current_header': "📖 മലയാളം നിഘണ്ടു",
+        'history_page': 0,
+        'favorites_page': 0,
         'show_keyboard': False,
+        'keyboard_version': 0,
         'search_term': "",
-        'header_counter': 0,
         'direction_radio': "English → മലയാളം", # FIX: Default value for st.radio
         'show_add_word': False,
         'show_history': False,
@@ -328,120 +476,71 @@ def init_session_state():
 
 init_session_state()
 
-# Auto header blinking with JavaScript-like behavior
-def update_header():
-    # Change every 4 seconds in terms of rerun counts (Streamlit reruns frequently)
-    if st.session_state.header_counter % 4 == 0: 
-        if "മലയാളം" in st.session_state.current_header:
-            st.session_state.current_header = "📖 Malayalam Dictionary"
-        else:
-            st.session_state.current_header = "📖 മലയാളം നിഘണ്ടു"
-    st.session_state.header_counter += 1
+USER_COOKIE = "dictionary_user"
+USER_COOKIE_MAX_AGE = 400 * 24 * 3600  # the longest browsers keep a cookie
+
+def current_user():
+    """This browser's user token, kept in a first-party cookie (never in the URL)"""
+    if 'user_token' not in st.session_state:
+        token = st.context.cookies.get(USER_COOKIE, "")
+        if not isinstance(token, str) or not re.fullmatch(r"[0-9a-f]{32}", token):
+            token = uuid.uuid4().hex
+            # Read back from the request headers on the next visit
+            st.components.v1.html(
+                f"<script>window.parent.document.cookie = '{USER_COOKIE}={token}; "
+                f"max-age={USER_COOKIE_MAX_AGE}; path=/; SameSite=Strict';</script>",
+                height=0, width=0)
+        if "user" in st.query_params:
+            del st.query_params["user"]  # tokens in old links are not trusted
+        st.session_state.user_token = token
+    return st.session_state.user_token
 
 # Helper functions
 def add_to_history(word, direction):
     """Add search to history"""
-    if word.strip():
-        # Remove if already exists
-        st.session_state.search_history = [
-            item for item in st.session_state.search_history 
-            if not (item['word'].lower() == word.lower() and item['direction'] == direction)
-        ]
-        
-        # Add to beginning
-        st.session_state.search_history.insert(0, {
-            'word': word,
-            'direction': direction,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 100
-        st.session_state.search_history = st.session_state.search_history[:100]
+    user_store().add_history(current_user(), word, direction)
 
 def add_to_favorites(word, translation, direction):
     """Add to favorites"""
-    favorite_item = {
-        'word': word,
-        'translation': translation,
-        'direction': direction,
-        'timestamp': datetime.now().isoformat()
-    }
-    
-    # Check if already exists
-    existing = next((item for item in st.session_state.favorites if 
-                     item['word'].lower() == word.lower() and 
-                     item['translation'] == translation and # Use full translation for unique key
-                     item['direction'] == direction), None)
-    
-    if not existing:
-        st.session_state.favorites.append(favorite_item)
+    if user_store().add_favorite(current_user(), word, translation, direction):
         st.toast(f"✨ Added '{word}' to favorites!")
     else:
         st.toast(f"'{word}' is already in favorites!")
 
 def remove_from_favorites(word, translation, direction):
     """Remove from favorites"""
-    st.session_state.favorites = [
-        item for item in st.session_state.favorites
-        if not (item['word'].lower() == word.lower() and 
-                item['translation'] == translation and
-                item['direction'] == direction)
-    ]
+    user_store().remove_favorite(current_user(), word, translation, direction)
     st.toast(f"🗑️ Removed '{word}' from favorites!")
 
+def render_pager(state_key, total):
+    """Previous/next page buttons; returns the offset of the current page"""
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = min(st.session_state[state_key], pages - 1)
+    if pages > 1:
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("◀ Previous", key=f"{state_key}_prev", disabled=page == 0):
+                st.session_state[state_key] = page - 1
+                st.rerun()
+        with col_info:
+            st.caption(f"Page {page + 1} of {pages}")
+        with col_next:
+            if st.button("Next ▶", key=f"{state_key}_next", disabled=page == pages - 1):
+                st.session_state[state_key] = page + 1
+                st.rerun()
+    return page * PAGE_SIZE
 
-def search_dictionary(query, direction, enml_data, mlml_data):
+
+def search_dictionary(query, direction, engine, limit=None):
     """
     Search dictionary based on direction with enhanced matching.
-    Returns: (suggestions: list, exact_matches: list, related_matches: list)
+    At most ``limit`` related matches are built; see SearchResults.related_count.
+    Returns: SearchResults, unpacking as
+    (suggestions: list, exact_matches: list, related_matches: list)
     """
-    if not query.strip():
-        return [], [], []
-    
-    query_lower = query.strip().lower()
-    
-    if direction == "English → മലയാളം":
-        df = enml_data
-        from_col, to_col = 'from_content', 'to_content'
-        
-    elif direction == "മലയാളം → English":
-        df = enml_data
-        from_col, to_col = 'to_content', 'from_content' # Invert for search
-        
-    else:  # മലയാളം → മലയാളം
-        df = mlml_data
-        from_col, to_col = 'from_content', 'to_content'
-    
-    # --- Exact Matches ---
-    exact_matches_df = df[df[from_col].astype(str).str.lower() == query_lower]
-    
-    # --- Related/Suggested Matches ---
-    # Words that start with the query
-    startswith_matches_df = df[
-        (df[from_col].astype(str).str.lower().str.startswith(query_lower)) &
-        (df[from_col].astype(str).str.lower() != query_lower)
-    ]
-    
-    # Words that contain the query (only if not an exact match or startswith)
-    contains_matches_df = df[
-        (df[from_col].astype(str).str.lower().str.contains(query_lower)) &
-        (~df[from_col].astype(str).str.lower().str.startswith(query_lower)) &
-        (df[from_col].astype(str).str.lower() != query_lower)
-    ]
-    
-    # Combine related matches, prioritize 'startswith'
-    related_matches_df = pd.concat([startswith_matches_df, contains_matches_df]).drop_duplicates(subset=[from_col])
-    
-    # --- Autocomplete/Suggestion List (from 'from_content' column for search bar) ---
-    all_matched_words = pd.concat([exact_matches_df, related_matches_df])
-    # Use the original content column for suggestions
-    suggestions = all_matched_words[from_col].unique()[:20] 
-
-    # Prepare final results format: [(search_word, translation)]
-    exact_results = [(row[from_col], row[to_col]) for _, row in exact_matches_df.iterrows()]
-    related_results = [(row[from_col], row[to_col]) for _, row in related_matches_df.iterrows()]
-    
-    return list(suggestions), exact_results, related_results
+    with APP_SEARCH_SECONDS.labels(DIRECTION_KEYS[direction]).time():
+        return shared_lookups(engine, id(engine)).run("lookup", DIRECTION_KEYS[direction],
+                                                      query, limit)
 
 
 # Malayalam Keyboard Layout
@@ -460,7 +559,7 @@ malayalam_layout = [
     ['ം', 'ഃ', 'അം', 'അഃ', 'ള്‍']
 ]
 
-def render_add_word_dialog(enml_data, mlml_data):
+def render_add_word_dialog(engine):
     """Render add word dialog"""
     st.markdown("### ➕ Add New Word")
     
@@ -481,9 +580,13 @@ def render_add_word_dialog(enml_data, mlml_data):
         
         if submitted:
             if from_word.strip() and to_word.strip():
-                # In a real app, you would add to the Google Sheet here
-                st.success(f"✅ Successfully added: {from_word} → {to_word}")
-                st.info("Note: In production, this would be saved to your Google Sheet")
+                try:
+                    engine.add_entry(DIRECTION_KEYS[direction], from_word.strip(), to_word.strip())
+                except OSError as e:
+                    st.error(f"❌ Could not save the word: {e}")
+                else:
+                    st.success(f"✅ Successfully added: {from_word} → {to_word}")
+                    st.info("Note: Saved on this server; add it to the Google Sheet to share it everywhere")
             else:
                 st.error("❌ Both fields are required!")
 
@@ -491,16 +594,20 @@ def render_history_section():
     """Render search history section"""
     st.markdown("### 📜 Search History")
     
-    if st.session_state.search_history:
+    store, user = user_store(), current_user()
+    total = store.history_count(user)
+    if total:
         # Clear history button
         if st.button("🗑️ Clear All History", type="secondary"):
-            st.session_state.search_history = []
+            store.clear_history(user)
+            st.session_state.history_page = 0
             st.success("Search history cleared!")
             st.rerun()
         
-        st.markdown(f"**{len(st.session_state.search_history)} recent searches:**")
+        st.markdown(f"**{total} recent searches:**")
+        offset = render_pager("history_page", total)
         
-        for i, item in enumerate(st.session_state.search_history[:20]):
+        for i, item in enumerate(store.history(user, offset, PAGE_SIZE)):
             timestamp = datetime.fromisoformat(item['timestamp']).strftime("%Y-%m-%d %H:%M")
             direction_emoji = {"English → മലയാളം": "🇬🇧→🇮🇳", "മലയാളം → English": "🇮🇳→🇬🇧", "മലയാളം → മലയാളം": "🇮🇳→🇮🇳"}
             
@@ -517,7 +624,7 @@ def render_history_section():
             
             with col3:
                 if st.button("❌", key=f"del_hist_{i}", help="Remove from history"):
-                    st.session_state.search_history.pop(i)
+                    store.remove_history(user, item['word'], item['direction'])
                     st.rerun()
     else:
         st.info("No search history yet. Start searching to build your history!")
@@ -526,16 +633,20 @@ def render_favorites_section():
     """Render favorites section"""
     st.markdown("### ⭐ Favorites")
     
-    if st.session_state.favorites:
+    store, user = user_store(), current_user()
+    total = store.favorite_count(user)
+    if total:
         # Clear favorites button
         if st.button("🗑️ Clear All Favorites", type="secondary"):
-            st.session_state.favorites = []
+            store.clear_favorites(user)
+            st.session_state.favorites_page = 0
             st.success("All favorites cleared!")
             st.rerun()
         
-        st.markdown(f"**{len(st.session_state.favorites)} bookmarked words:**")
+        st.markdown(f"**{total} bookmarked words:**")
+        offset = render_pager("favorites_page", total)
         
-        for i, item in enumerate(st.session_state.favorites):
+        for i, item in enumerate(store.favorites(user, offset, PAGE_SIZE)):
             timestamp = datetime.fromisoformat(item['timestamp']).strftime("%Y-%m-%d")
             direction_emoji = {"English → മലയാളം": "🇬🇧→🇮🇳", "മലയാളം → English": "🇮🇳→🇬🇧", "മലയാളം → മലയാളം": "🇮🇳→🇮🇳"}
             
@@ -562,11 +673,12 @@ def render_export_section():
     """Render export section"""
     st.markdown("### 📤 Export Data")
     
+    store, user = user_store(), current_user()
     col1, col2 = st.columns(2)
     
     with col1:
-        if st.session_state.search_history:
-            history_df = pd.DataFrame(st.session_state.search_history)
+        if store.history_count(user):
+            history_df = pd.DataFrame(store.history(user, limit=None))
             csv_history = history_df.to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="📊 Download Search History (.csv)",
@@ -579,8 +691,8 @@ def render_export_section():
             st.info("No search history to export")
     
     with col2:
-        if st.session_state.favorites:
-            favorites_df = pd.DataFrame(st.session_state.favorites)
+        if store.favorite_count(user):
+            favorites_df = pd.DataFrame(store.favorites(user, limit=None))
             csv_favorites = favorites_df.to_csv(index=False).encode('utf-8')
             st.download_button(
                 label="⭐ Download Favorites (.csv)",
@@ -592,6 +704,119 @@ def render_export_section():
         else:
             st.info("No favorites to export")
 
+def render_batch_section(engine):
+    """Render batch translation of an uploaded file"""
+    st.markdown("### 📄 Batch Translate")
+    uploaded = st.file_uploader("Upload a word list, text or CSV file",
+                                type=["txt", "csv", "tsv", "md"], key="batch_upload")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        direction = st.selectbox("Direction", ["Auto"] + list(DIRECTION_KEYS), key="batch_direction")
+    with col2:
+        fmt = st.selectbox("Output", ["csv", "jsonl"], key="batch_format")
+    with col3:
+        lines = st.checkbox("One term per line / cell", key="batch_lines",
+                            help="Keep multi-word entries together instead of splitting words")
+    if uploaded is None:
+        return
+
+    # Translating only on request (the upload survives every rerun); the
+    # last result is kept per session for the same file and options
+    options = (uploaded.file_id, direction, fmt, lines)
+    previous = st.session_state.get("batch_result")
+    if st.button("🚀 Translate", type="primary", key="batch_translate"):
+        # Results stream to a temporary file rather than being held in memory
+        output = tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="",
+                                             suffix=f".{fmt}", delete=False)
+        try:
+            with st.spinner("Translating..."), output:
+                uploaded.seek(0)
+                written, found = translate_file(
+                    engine, uploaded, output,
+                    kind="csv" if uploaded.name.lower().endswith(".csv") else "text",
+                    fmt=fmt, direction=DIRECTION_KEYS.get(direction, "auto"), lines=lines)
+        except (ValueError, pd.errors.ParserError) as e:
+            os.unlink(output.name)
+            st.error(f"Could not translate {uploaded.name}: {e}")
+            return
+        if previous is not None:
+            Path(previous["path"]).unlink(missing_ok=True)
+        previous = st.session_state.batch_result = {
+            "options": options, "path": output.name, "written": written, "found": found}
+
+    if previous is None or previous["options"] != options:
+        return
+    path = Path(previous["path"])
+    if not path.exists():
+        return
+    st.success(f"Translated **{previous['written']:,}** distinct terms "
+               f"({previous['found']:,} found)")
+    # The file is read only when the button is clicked, but Streamlit serves
+    # a download from memory: outputs of hundreds of MB are better made with
+    # `python batch_translate.py`, which streams end to end
+    st.download_button(
+        label=f"⬇️ Download translations (.{fmt}, {path.stat().st_size / 1e6:.1f} MB)",
+        data=path.read_bytes,
+        file_name=f"{Path(uploaded.name).stem}_translated.{fmt}",
+        mime="text/csv" if fmt == "csv" else "application/jsonl",
+        type="primary"
+    )
+
+def render_metrics_panel():
+    """Timings and counters of this server process (see metrics.py)"""
+    if not metrics.ENABLED:
+        st.caption("Metrics are off (DICTIONARY_METRICS=0)")
+        return
+    snapshot = metrics.snapshot()
+    reruns = snapshot["app_reruns_total"]["samples"][0]["value"]
+    uptime = snapshot["process_uptime_seconds"]["samples"][0]["value"]
+    # The current rate comes from this session's earlier views of the panel
+    # within the last RATE_WINDOW_SECONDS; on the first view only the average
+    # since the process started is known
+    now = time.time()
+    samples = st.session_state.setdefault("metrics_reruns", [])  # [(time, reruns), ...]
+    while len(samples) > 1 and now - samples[1][0] >= RATE_WINDOW_SECONDS:
+        samples.pop(0)
+    samples.append((now, reruns))
+    since, before = samples[0]
+    st.markdown('<div class="stats-card">', unsafe_allow_html=True)
+    if now - since >= 1:
+        st.metric("🔁 Reruns / min", f"{60 * (reruns - before) / (now - since):.1f}",
+                  help=f"{reruns - before:,} script runs in the last {now - since:.0f} s "
+                       "(all sessions)")
+    else:
+        st.metric("🔁 Avg reruns / min since start", f"{60 * reruns / max(uptime, 60):.1f}",
+                  help=f"{reruns:,} script runs in {uptime / 60:.0f} min (all sessions)")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # One row per timed path: count and estimated latency percentiles
+    rows = []
+    for name, metric in snapshot.items():
+        if metric["type"] != "histogram":
+            continue
+        for sample in metric["samples"]:
+            if sample["count"]:
+                label = "/".join(sample["labels"].values())
+                rows.append({"timing": f"{name.removesuffix('_seconds')} {label}".strip(),
+                             "n": sample["count"], "p50 ms": sample["p50_ms"],
+                             "p99 ms": sample["p99_ms"]})
+    if rows:
+        st.markdown("**⏱️ Timings**")
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    calls = {s["labels"]["cache"]: s["value"] for s in snapshot["app_cache_calls_total"]["samples"]}
+    misses = {s["labels"]["cache"]: s["value"]
+              for s in snapshot["app_cache_misses_total"]["samples"]}
+    for cache, count in calls.items():
+        st.caption(f"st.cache_resource '{cache}': {count - misses.get(cache, 0):,} hits "
+                   f"of {count:,} calls")
+
+    st.download_button("📈 Metrics (Prometheus)", metrics.render_prometheus(),
+                       file_name="metrics.prom", mime="text/plain", use_container_width=True)
+    st.download_button("🧾 Metrics (JSON)", json.dumps(snapshot, ensure_ascii=False, indent=2),
+                       file_name="metrics.json", mime="application/json",
+                       use_container_width=True)
+
 def render_contact_section():
     """Render contact section"""
     st.markdown("### 📬 Contact Information")
@@ -622,18 +847,19 @@ def render_contact_section():
     """)
 
 def main():
+    APP_RERUNS.inc()
     # Load data
     try:
-        enml_data, mlml_data = load_dictionary_data()
+        engine = load_dictionary_engine()
     except Exception as e:
         st.error(f"Failed to load dictionary data: {e}")
         st.stop()
     
-    # Auto-update header for blinking effect
-    update_header()
-    
-    # Blinking Header
-    st.markdown(f'<div class="blinking-header">{st.session_state.current_header}</div>', 
+    # Blinking Header (the title swap is a CSS animation, no reruns needed)
+    st.markdown('<div class="blinking-header">'
+                '<span class="header-title header-title-ml">📖 മലയാളം നിഘണ്ടു</span>'
+                '<span class="header-title header-title-en">📖 Malayalam Dictionary</span>'
+                '</div>', 
                 unsafe_allow_html=True)
     
     
@@ -683,13 +909,14 @@ def main():
     
     # Render selected feature
     if st.session_state.show_add_word:
-        render_add_word_dialog(enml_data, mlml_data)
+        render_add_word_dialog(engine)
     elif st.session_state.show_history:
         render_history_section()
     elif st.session_state.show_favorites:
         render_favorites_section()
     elif st.session_state.show_export:
         render_export_section()
+        render_batch_section(engine)
     elif st.session_state.show_contact:
         render_contact_section()
     
@@ -702,11 +929,23 @@ def main():
     final_search_query = st.session_state.search_term
     exact_results = []
     related_results = []
+    manglish_candidates = []
+    
+    # Manglish mode: romanized input ("vellam") is searched as its best
+    # Malayalam headword (വെള്ളം); the other spellings are offered as chips
+    if (st.session_state.get("manglish_mode") and final_search_query
+            and DIRECTION_KEYS[direction] != "en-ml" and final_search_query.strip().isascii()):
+        manglish_candidates = shared_transliterator(engine, id(engine)).transliterate(
+            DIRECTION_KEYS[direction], final_search_query, MAX_SUGGESTION_CHIPS)
+        if manglish_candidates:
+            final_search_query = manglish_candidates[0]
     
     if final_search_query:
-        # We search once to get all results
+        # We search once to get all results; only the related words that are
+        # displayed get built, the rest is just counted
         # The first returned value (live_suggestions) is only used in col_main2 now.
-        _, exact_results, related_results = search_dictionary(final_search_query, direction, enml_data, mlml_data)
+        results = search_dictionary(final_search_query, direction, engine, limit=MAX_SUGGESTION_CHIPS)
+        _, exact_results, related_results = results
         
         # Combine all results, prioritizing exact matches
         all_results = exact_results + related_results
@@ -731,6 +970,11 @@ def main():
             key="direction_radio",
             help="Select the direction for translation"
         )
+        st.checkbox(
+            "🔤 Manglish input (vellam → വെള്ളം)",
+            key="manglish_mode",
+            help="Type Malayalam words in English letters; used for the മലയാളം directions"
+        )
         
         # Search input with autocompletion/type prediction
         def update_search_term():
@@ -753,10 +997,12 @@ def main():
                 st.session_state.show_keyboard = not st.session_state.show_keyboard
         
         with col_kb2:
-            if st.button("🔄 Clear Search", use_container_width=True):
+            def clear_search():
+                # A callback runs before the text input exists, so it may reset it
                 st.session_state.search_term = ""
                 st.session_state.search_input_live = "" # Clear the input widget state as well
-                st.rerun()
+            
+            st.button("🔄 Clear Search", use_container_width=True, on_click=clear_search)
         
         with col_kb3:
             # Explicit search button - triggers search even if user didn't press enter
@@ -769,45 +1015,28 @@ def main():
         if st.session_state.show_keyboard:
             st.markdown('<div class="malayalam-keyboard">', unsafe_allow_html=True)
             st.markdown("#### 🔤 മലയാളം അക്ഷരങ്ങൾ (Malayalam Characters)")
-            st.markdown("*Click characters to add them to search box*")
-            
-            for row_idx, row in enumerate(malayalam_layout):
-                cols = st.columns(len([c for c in row if c.strip()]))
-                col_idx = 0
-                for char in row:
-                    if char.strip():
-                        if cols[col_idx].button(char, key=f"kbd_{row_idx}_{char}", help=f"Add {char}"):
-                            # Direct modification of the text input value in session state for rerun
-                            st.session_state.search_input_live += char
-                            st.session_state.search_term = st.session_state.search_input_live
-                            st.rerun()
-                        col_idx += 1
+            st.markdown("*Click characters to type; the search runs when you pause or press 🔍*")
             
-            # Keyboard control buttons
-            st.markdown("---")
-            col_ctrl1, col_ctrl2, col_ctrl3, col_ctrl4 = st.columns(4)
+            # The keyboard keeps the last text it sent; once the search changes
+            # elsewhere (Clear Search, a suggestion) that value is stale, and a
+            # fresh key resets it so typing the same word again still reports
+            keyboard_key = f"malayalam_keyboard_{st.session_state.keyboard_version}"
+            if st.session_state.get(keyboard_key, st.session_state.search_term) != st.session_state.search_term:
+                st.session_state.keyboard_version += 1
+                keyboard_key = f"malayalam_keyboard_{st.session_state.keyboard_version}"
             
-            with col_ctrl1:
-                if st.button("⌫ Backspace", key="backspace", use_container_width=True):
-                    if st.session_state.search_input_live:
-                        st.session_state.search_input_live = st.session_state.search_input_live[:-1]
-                        st.session_state.search_term = st.session_state.search_input_live
-                        st.rerun()
-                
-            with col_ctrl2:
-                if st.button("🔄 Clear All", key="clear_all", use_container_width=True):
-                    st.session_state.search_input_live = ""
-                    st.session_state.search_term = ""
-                    st.rerun()
+            def apply_keyboard_text():
+                # Runs before the rerun, so the text input can still be updated
+                st.session_state.search_term = st.session_state[keyboard_key]
+                st.session_state.search_input_live = st.session_state[keyboard_key]
             
-            with col_ctrl3:
-                # Placeholder for clipboard paste info
-                st.info("Use Ctrl+V to paste")
+            # Keys are handled in the browser; only the finished text comes back
+            malayalam_keyboard(st.session_state.search_term, malayalam_layout,
+                               key=keyboard_key, on_change=apply_keyboard_text)
             
-            with col_ctrl4:
-                if st.button("❌ Hide Keyboard", key="hide_keyboard", use_container_width=True):
-                    st.session_state.show_keyboard = False
-                    st.rerun()
+            if st.button("❌ Hide Keyboard", key="hide_keyboard"):
+                st.session_state.show_keyboard = False
+                st.rerun()
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -825,15 +1054,12 @@ def main():
                 st.markdown('<div class="search-result-card-container malayalam-font">', unsafe_allow_html=True)
                 st.markdown(f'<h4 class="translation-header">{final_search_query} ({direction})</h4>', unsafe_allow_html=True)
 
-                st.success(f"🎯 Found **{len(exact_results)}** exact match(es) and **{len(related_results)}** related word(s)")
+                st.success(f"🎯 Found **{len(exact_results)}** exact match(es) and **{results.related_count}** related word(s)")
 
                 
                 # Helper function to check if word is favorite
                 def is_word_favorite(word, translation, direction):
-                    return any(fav['word'].lower() == word.lower() and 
-                               fav['translation'] == translation and 
-                               fav['direction'] == direction 
-                               for fav in st.session_state.favorites)
+                    return user_store().is_favorite(current_user(), word, translation, direction)
 
                 
                 # Display Exact Matches
@@ -880,20 +1106,29 @@ def main():
         with st.expander("📊 Show Statistics", expanded=False):
             st.markdown("---")
             st.markdown('<div class="stats-card">', unsafe_allow_html=True)
-            st.metric("📚 English-Malayalam", f"{len(enml_data):,}")
+            st.metric("📚 English-Malayalam", f"{engine.size('en-ml'):,}")
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="stats-card">', unsafe_allow_html=True)
-            st.metric("📖 Malayalam-Malayalam", f"{len(mlml_data):,}")
+            st.metric("📖 Malayalam-Malayalam", f"{engine.size('ml-ml'):,}")
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="stats-card">', unsafe_allow_html=True)
-            st.metric("📜 Search History", f"{len(st.session_state.search_history)}")
+            st.metric("📜 Search History", f"{user_store().history_count(current_user())}")
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="stats-card">', unsafe_allow_html=True)
-            st.metric("⭐ Favorites", f"{len(st.session_state.favorites)}")
+            st.metric("⭐ Favorites", f"{user_store().favorite_count(current_user())}")
             st.markdown('</div>', unsafe_allow_html=True)
+            
+            cache_stats = shared_lookups(engine, id(engine)).stats()
+            st.markdown('<div class="stats-card">', unsafe_allow_html=True)
+            st.metric("⚡ Lookup Cache Hits", f"{cache_stats['hit_rate']:.0%}",
+                      help=f"{cache_stats['hits']:,} cached, {cache_stats['coalesced']:,} shared "
+                           f"in flight, {cache_stats['misses']:,} computed; "
+                           f"{cache_stats['entries']:,} entries")
+            st.markdown('</div>', unsafe_allow_html=True)
+            render_metrics_panel()
             st.markdown("---")
 
 
@@ -903,10 +1138,17 @@ def main():
         suggestion_header = ""
         suggestion_type = ""
         
+        # 0. Malayalam spellings of a Manglish query, best first
+        if manglish_candidates:
+            suggestions_to_show = manglish_candidates
+            suggestion_header = "🔤 Manglish → മലയാളം"
+            suggestion_type = "manglish"
+        
         # 1. Real-time Autocomplete (while typing - search_term exists but final_search_query hasn't been officially run by a button press, or the input changed)
-        if st.session_state.search_term and not final_search_query:
-            # We must re-run search_dictionary here to get the real-time suggestions based on the live input
-            live_suggestions, _, _ = search_dictionary(st.session_state.search_term, direction, enml_data, mlml_data)
+        elif st.session_state.search_term and not final_search_query:
+            # Real-time suggestions for the live input (no translations needed)
+            live_suggestions = shared_lookups(engine, id(engine)).run(
+                "suggest", DIRECTION_KEYS[direction], st.session_state.search_term)
             suggestions_to_show = live_suggestions
             suggestion_header = "💡 Real-time Autocomplete"
             suggestion_type = "autocomplete"
@@ -923,8 +1165,8 @@ def main():
             st.markdown(f"#### {suggestion_header}")
             st.markdown('<div class="suggestion-chip-container">', unsafe_allow_html=True)
             
-            # Display only the top 15 suggestions
-            for i, suggestion in enumerate(suggestions_to_show[:15]):
+            # Display only the top suggestions
+            for i, suggestion in enumerate(suggestions_to_show[:MAX_SUGGESTION_CHIPS]):
                 # Use a button styled as a chip to set the search term
                 # Clicking a suggestion updates the search input and triggers a full search
                 if st.button(suggestion, key=f"{suggestion_type}_{i}", help=f"Search for {suggestion}"):
@@ -938,10 +1180,6 @@ def main():
         else:
             st.info("Start typing to see real-time suggestions here.")
 
-    
-    # Auto-refresh for header blinking (every 2 seconds)
-    time.sleep(0.1) 
-    st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+"""Words added on the SQLite backend are found like on the in-memory one.
+
+    python -m unittest discover tests
+"""
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dictionary_engine import DictionaryEngine  # noqa: E402
+from dictionary_journal import WordJournal  # noqa: E402
+from dictionary_sqlite import DATABASE_NAME, build_database  # noqa: E402
+
+ENML = pd.DataFrame({"from_content": ["apple", "apply", "pineapple", "banana", "band"],
+                     "to_content": ["ആപ്പിൾ", "പ്രയോഗിക്കുക", "കൈതച്ചക്ക", "വാഴപ്പഴം", "സംഘം"]})
+MLML = pd.DataFrame({"from_content": ["വെള്ളം", "വെളിച്ചം"],
+                     "to_content": ["ജലം", "പ്രകാശം"]})
+QUERIES = ["app", "apple", "applet", "an", "ban", "bandx", "ആപ്പി", "ജല"]
+
+
+class SqliteOverlayTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        build_database(ENML, MLML, self.dir / DATABASE_NAME)
+
+    def open_sqlite(self):
+        return DictionaryEngine.open_sqlite(self.dir / DATABASE_NAME)
+
+    def add_words(self, engine):
+        engine.add_entry("en-ml", "applet", "ചെറുപ്രോഗ്രാം")
+        engine.add_entry("en-ml", "banana", "ഏത്തപ്പഴം")
+
+    def assert_same_answers(self, engine, memory):
+        for direction in ("en-ml", "ml-en"):
+            cursor = engine.cursor(direction)
+            for query in QUERIES:
+                with self.subTest(direction=direction, query=query):
+                    self.assertEqual(list(engine.lookup(direction, query)),
+                                     list(memory.lookup(direction, query)))
+                    self.assertEqual(engine.suggest(direction, query, cursor=cursor),
+                                     memory.suggest(direction, query))
+
+    def test_added_word_is_found(self):
+        engine, memory = self.open_sqlite(), DictionaryEngine(ENML, MLML)
+        self.add_words(engine)
+        self.add_words(memory)
+        self.assertEqual(engine.define("en-ml", "applet"), ("applet", ("ചെറുപ്രോഗ്രാം",)))
+        self.assertEqual(engine.define("en-ml", "banana"), ("banana", ("വാഴപ്പഴം", "ഏത്തപ്പഴം")))
+        self.assert_same_answers(engine, memory)
+
+    def test_journal_replay(self):
+        journal = WordJournal(self.dir / "additions.journal")
+        journal.append("en_ml", "applet", "ചെറുപ്രോഗ്രാം")
+        journal.append("en_ml", "banana", "ഏത്തപ്പഴം")
+        engine, memory = self.open_sqlite(), DictionaryEngine(ENML, MLML)
+        engine.attach_journal(WordJournal(self.dir / "additions.journal"), {})
+        self.add_words(memory)
+        self.assert_same_answers(engine, memory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Manglish (romanized Malayalam) to Malayalam script, against the dictionary.
+
+Typing "vellam" or "kadal" gives ranked Malayalam headwords (വെള്ളം,
+കടൽ). Romanization is ambiguous (t is ത or ട, l is ല or ള, a final n is
+ൻ or ന്), so the input is parsed with a compiled longest-match rule table
+whose rules may have several readings, each with a cost. The readings are
+explored with a beam search that only keeps partial spellings some headword
+of the chosen direction starts with, so the candidates are always real
+headwords: exact spellings first, then completions of the best partial
+spellings, cheaper readings and better-ranked headwords first.
+
+Spelling works the way the script does: a consonant is written with a
+virama (ക്) until a vowel follows and turns it into a vowel sign (കു) or,
+for "a", the inherent vowel (ക); a consonant followed by a consonant makes a
+conjunct (ക്ക). At the end of a word a pending n/r/l/L/N may become a chillu
+(ൻ ർ ൽ ൾ ൺ) and m an anusvara (ം).
+
+Capitals select retroflex / long sounds (T ട, D ഡ, N ണ, L ള, R റ, A ആ,
+E ഏ, O ഓ); an all-lowercase input simply considers those as costlier
+readings.
+"""
+import heapq
+
+from dictionary_index import SUGGESTION_LIMIT
+
+BEAM_WIDTH = 48         # partial spellings kept per input position
+SHORTER_MATCH_COST = 1.0  # reading a shorter rule where a longer one matches
+COMPLETION_COST = 1.0   # a completion ranks below an exact spelling of equal cost
+COMPLETION_STATES = 4   # partial spellings whose completions are offered
+
+VIRAMA = "്"
+ANUSVARA = "ം"
+CHILLUS = {"ന": "ൻ", "ണ": "ൺ", "ര": "ർ", "ല": "ൽ", "ള": "ൾ"}
+
+# roman -> ((independent vowel, vowel sign, cost), ...); "a" has no sign
+VOWELS = {
+    "a": (("അ", "", 0.0), ("ആ", "ാ", 0.8)),
+    "aa": (("ആ", "ാ", 0.0),), "A": (("ആ", "ാ", 0.0),),
+    "i": (("ഇ", "ി", 0.0), ("ഈ", "ീ", 1.0)),
+    "ii": (("ഈ", "ീ", 0.0),), "ee": (("ഈ", "ീ", 0.0),), "I": (("ഈ", "ീ", 0.0),),
+    "u": (("ഉ", "ു", 0.0), ("ഊ", "ൂ", 1.0)),
+    "uu": (("ഊ", "ൂ", 0.0),), "oo": (("ഊ", "ൂ", 0.0), ("ഓ", "ോ", 0.5)),
+    "U": (("ഊ", "ൂ", 0.0),),
+    "e": (("എ", "െ", 0.0), ("ഏ", "േ", 0.7)), "E": (("ഏ", "േ", 0.0),),
+    "ae": (("ഏ", "േ", 0.0),),
+    "ai": (("ഐ", "ൈ", 0.0),), "ei": (("ഐ", "ൈ", 0.5),),
+    "o": (("ഒ", "ൊ", 0.0), ("ഓ", "ോ", 0.7)), "O": (("ഓ", "ോ", 0.0),),
+    "au": (("ഔ", "ൗ", 0.0),), "ou": (("ഔ", "ൗ", 0.0),),
+    "ri": (("ഋ", "ൃ", 0.7),), "Ru": (("ഋ", "ൃ", 0.0),),
+}
+
+# roman -> ((consonant or cluster, cost), ...)
+CONSONANTS = {
+    "k": (("ക", 0.0),), "kh": (("ഖ", 0.0),), "g": (("ഗ", 0.0),), "gh": (("ഘ", 0.0),),
+    "ng": (("ങ", 0.0), ("ങ്ങ", 0.3)), "nk": (("ങ്ക", 0.0),),
+    "c": (("ക", 0.5), ("ച", 0.7)), "ch": (("ച", 0.0), ("ച്ച", 0.5)), "cch": (("ച്ച", 0.0),),
+    "chh": (("ഛ", 0.0),),
+    "j": (("ജ", 0.0),), "jh": (("ഝ", 0.0),), "nj": (("ഞ", 0.0),), "nch": (("ഞ്ച", 0.0),),
+    "T": (("ട", 0.0),), "Th": (("ഠ", 0.0),), "D": (("ഡ", 0.0),), "Dh": (("ഢ", 0.0),),
+    "N": (("ണ", 0.0),),
+    "t": (("ത", 0.0), ("ട", 0.5)), "th": (("ത", 0.0), ("ഥ", 0.7)),
+    "tt": (("ട്ട", 0.0), ("റ്റ", 0.3), ("ത്ത", 0.5)), "thth": (("ത്ത", 0.0),),
+    "d": (("ദ", 0.0), ("ഡ", 0.5), ("ട", 0.5)), "dh": (("ധ", 0.0),),
+    "n": (("ന", 0.0), ("ണ", 0.5)), "nn": (("ന്ന", 0.0), ("ണ്ണ", 0.5)),
+    "nt": (("ന്റ", 0.0), ("ന്ത", 0.3), ("ണ്ട", 0.5)), "nd": (("ണ്ട", 0.0), ("ന്ദ", 0.5)),
+    "nth": (("ന്ത", 0.0),), "mb": (("മ്പ", 0.0), ("മ്ബ", 0.5)),
+    "p": (("പ", 0.0),), "ph": (("ഫ", 0.0),), "f": (("ഫ", 0.0),),
+    "b": (("ബ", 0.0),), "bh": (("ഭ", 0.0),), "m": (("മ", 0.0),),
+    "y": (("യ", 0.0),), "r": (("ര", 0.0), ("റ", 0.5)), "R": (("റ", 0.0),),
+    "l": (("ല", 0.0), ("ള", 0.5)), "L": (("ള", 0.0),), "ll": (("ല്ല", 0.0), ("ള്ള", 0.3)),
+    "v": (("വ", 0.0),), "w": (("വ", 0.0),),
+    "sh": (("ശ", 0.0), ("ഷ", 0.3)), "S": (("ഷ", 0.0),), "s": (("സ", 0.0),),
+    "h": (("ഹ", 0.0),), "zh": (("ഴ", 0.0),), "z": (("ഴ", 0.3), ("സ", 0.7)),
+    "x": (("ക്സ", 0.0),), "q": (("ക്ക", 0.0),), "ksh": (("ക്ഷ", 0.0),),
+}
+
+
+def _compile():
+    """roman -> ((kind, text, sign, cost), ...), plus the longest rule length."""
+    rules = {}
+    for roman, readings in VOWELS.items():
+        rules.setdefault(roman, []).extend(("vowel", letter, sign, cost)
+                                           for letter, sign, cost in readings)
+    for roman, readings in CONSONANTS.items():
+        rules.setdefault(roman, []).extend(("consonant", text, "", cost)
+                                           for text, cost in readings)
+    # m before a consonant may be an anusvara (സംഭവം), and n/r/l/L/N a chillu
+    rules["m"].append(("mark", ANUSVARA, "", 0.4))
+    for roman in ("n", "N", "r", "l", "L"):
+        rules[roman].extend(("mark", CHILLUS[text], "", cost + 0.5)
+                            for _, text, _, cost in list(rules[roman]) if text in CHILLUS)
+    return {roman: tuple(readings) for roman, readings in rules.items()}, max(map(len, rules))
+
+
+RULES, MAX_RULE = _compile()
+
+
+def _step(out, kind, text, sign):
+    """Spelling ``out`` extended by one reading."""
+    if kind == "vowel":
+        if out.endswith(VIRAMA):
+            return out[:-1] + sign  # the consonant takes the vowel
+        return out + text
+    if kind == "consonant":
+        return out + text + VIRAMA
+    return out + text
+
+
+def _endings(out):
+    """Complete spellings of a finished ``out`` with their extra cost."""
+    if not out.endswith(VIRAMA):
+        yield out, 0.0
+        if out.endswith("ു"):
+            yield out[:-1] + VIRAMA, 0.3  # a final "u" is often a bare virama (പാട്ട്)
+        return
+    consonant = out[-2]
+    if consonant in CHILLUS:
+        yield out[:-2] + CHILLUS[consonant], 0.0
+        yield out, 0.3
+    elif consonant == "മ":
+        yield out[:-2] + ANUSVARA, 0.0
+        yield out, 0.5
+    else:
+        yield out, 0.0
+
+
+def _fold_case(text):
+    """Capitals carry meaning, except an initial one (phones capitalize it)."""
+    if len(text) > 1 and text[0].isupper() and text[1:].islower():
+        return text.lower()
+    return text
+
+
+class Transliterator:
+    """Manglish to Malayalam headwords of one engine's Malayalam-source directions."""
+
+    def __init__(self, engine, beam_width=BEAM_WIDTH):
+        self.engine = engine
+        self.beam_width = beam_width
+
+    def transliterate(self, direction, text, limit=SUGGESTION_LIMIT):
+        """
+        Malayalam headwords of ``direction`` ("ml-en" or "ml-ml") for the
+        romanized ``text``, best first. Returns [] when nothing matches.
+        """
+        if direction not in ("ml-en", "ml-ml"):
+            raise ValueError(f"Transliteration needs a Malayalam-source direction, not {direction}")
+        index = self.engine.indexes[direction]
+        text = _fold_case("".join(text.split()))
+        if not text or not text.isascii():
+            return []
+
+        viable_cache = {}
+
+        def viable(out):
+            """Whether some headword starts with ``out`` (a pending consonant may end as a chillu)."""
+            stems = [out]
+            if out.endswith(VIRAMA):
+                stems = [out[:-1]]
+                if out[-2] in CHILLUS:
+                    stems.append(out[:-2] + CHILLUS[out[-2]])
+            elif out.endswith("ു"):
+                stems.append(out[:-1])  # may end as a bare virama
+            for stem in stems:
+                found = viable_cache.get(stem)
+                if found is None:
+                    found = viable_cache[stem] = bool(
+                        index.first_forms(index.prefix_range(index.normalize(stem)), 1))
+                if found:
+                    return True
+            return False
+
+        # beams[pos]: {spelling: cost} for spellings covering text[:pos]
+        beams = [dict() for _ in range(len(text) + 1)]
+        beams[0][""] = 0.0
+        for pos in range(len(text)):
+            beam = beams[pos]
+            if not beam:
+                continue
+            if len(beam) > self.beam_width:
+                beam = dict(heapq.nsmallest(self.beam_width, beam.items(), key=lambda item: item[1]))
+            matches = [length for length in range(min(MAX_RULE, len(text) - pos), 0, -1)
+                       if text[pos:pos + length] in RULES
+                       or text[pos:pos + length].lower() in RULES]
+            for length in matches:
+                roman = text[pos:pos + length]
+                readings = RULES.get(roman) or RULES[roman.lower()]
+                penalty = 0.0 if length == matches[0] else SHORTER_MATCH_COST
+                target = beams[pos + length]
+                for out, cost in beam.items():
+                    for kind, letter, sign, reading_cost in readings:
+                        spelled = _step(out, kind, letter, sign)
+                        total = cost + reading_cost + penalty
+                        if total < target.get(spelled, float("inf")) and viable(spelled):
+                            target[spelled] = total
+
+        final = beams[-1]
+        scored = {}  # form -> score
+
+        def offer(form, score):
+            if score < scored.get(form, float("inf")):
+                scored[form] = score
+
+        for out, cost in final.items():
+            for spelled, extra in _endings(out):
+                for form in index.exact_forms(index.normalize(spelled)):
+                    offer(form, cost + extra)
+        for out, cost in heapq.nsmallest(COMPLETION_STATES, final.items(), key=lambda item: item[1]):
+            stem = out[:-1] if out.endswith(VIRAMA) else out
+            span = index.prefix_range(index.normalize(stem))
+            for form in index.first_forms(span, limit):
+                offer(form, cost + COMPLETION_COST)
+
+        ranked = sorted(scored.items(), key=lambda item: (item[1], item[0]))
+        words = dict.fromkeys(index.form_source(form) for form, _ in ranked)
+        return list(words)[:limit]
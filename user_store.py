@@ -0,0 +1,268 @@
+"""Persistent search history and favorites, per user, in one SQLite file.
+
+Every entry is keyed by a hash of what identifies it (word and direction for
+history; word, translation and direction for a favorite), and each user's
+keys are kept in memory, so "is this a favorite?" and "move this search to
+the top" are O(1) set / dict operations however long the lists get. Writes
+never wait for the disk: they update the in-memory keys, are queued, and a
+background thread applies them in batches, one transaction per batch. Reads
+of whole rows are paginated straight from SQLite (after the user's own
+pending writes are applied), so rendering a page touches only that page.
+
+Users are opaque tokens (a browser's id); only their hashes are stored.
+History keeps the latest ``history_limit`` distinct searches per user, and a
+repeated search moves to the top. Word keys ignore case, as the app does.
+"""
+import hashlib
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from dictionary_snapshot import SNAPSHOT_DIR
+
+log = logging.getLogger(__name__)
+
+USER_DB_PATH = SNAPSHOT_DIR / "user_data.sqlite"
+HISTORY_LIMIT = 100     # distinct searches kept per user
+PAGE_SIZE = 20
+WRITE_BATCH = 500       # queued writes applied per transaction
+CACHED_USERS = 1024     # users whose keys are kept in memory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    user BLOB NOT NULL, key BLOB NOT NULL,
+    word TEXT NOT NULL, direction TEXT NOT NULL, searched_at REAL NOT NULL,
+    PRIMARY KEY (user, key)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS history_recent ON history (user, searched_at);
+CREATE TABLE IF NOT EXISTS favorites (
+    user BLOB NOT NULL, key BLOB NOT NULL,
+    word TEXT NOT NULL, translation TEXT NOT NULL, direction TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (user, key)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS favorites_added ON favorites (user, added_at);
+"""
+
+
+def _hash(*parts):
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+
+def history_key(word, direction):
+    return _hash(word.lower(), direction)
+
+
+def favorite_key(word, translation, direction):
+    return _hash(word.lower(), translation, direction)
+
+
+class _UserKeys:
+    """One user's keys: history oldest-first, favorites as a set."""
+
+    def __init__(self, history, favorites):
+        self.history = OrderedDict.fromkeys(history)
+        self.favorites = set(favorites)
+
+
+class UserStore:
+    """History and favorites of many users, shared by all sessions of one process."""
+
+    def __init__(self, path=USER_DB_PATH, history_limit=HISTORY_LIMIT):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.history_limit = history_limit
+        self._lock = threading.Lock()
+        self._users = OrderedDict()  # user hash -> _UserKeys, least recently used first
+        self._pending = {}  # user hash -> writes queued but not yet applied
+        self._local = threading.local()  # one reading connection per thread
+        self._writes = queue.Queue()
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="user-store", daemon=True)
+        self._writer.start()
+
+    # --- History ---
+
+    def add_history(self, user, word, direction):
+        """Record a search; a repeated one moves to the top."""
+        if not word.strip():
+            return
+        user = _hash(user)
+        key = history_key(word, direction)
+        keys = self._keys(user)
+        with self._lock:
+            keys.history[key] = None
+            keys.history.move_to_end(key)
+            dropped = [keys.history.popitem(last=False)[0]
+                       for _ in range(len(keys.history) - self.history_limit)]
+        self._write(user, "INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?)",
+                    (user, key, word, direction, time.time()))
+        for old in dropped:
+            self._write(user, "DELETE FROM history WHERE user = ? AND key = ?", (user, old))
+
+    def remove_history(self, user, word, direction):
+        user = _hash(user)
+        key = history_key(word, direction)
+        keys = self._keys(user)
+        with self._lock:
+            keys.history.pop(key, None)
+        self._write(user, "DELETE FROM history WHERE user = ? AND key = ?", (user, key))
+
+    def clear_history(self, user):
+        user = _hash(user)
+        keys = self._keys(user)
+        with self._lock:
+            keys.history.clear()
+        self._write(user, "DELETE FROM history WHERE user = ?", (user,))
+
+    def history_count(self, user):
+        return len(self._keys(_hash(user)).history)
+
+    def history(self, user, offset=0, limit=PAGE_SIZE):
+        """
+        One page of searches, latest first; ``limit`` None reads them all.
+        Returns: [{"word", "direction", "timestamp"}, ...]
+        """
+        rows = self._read("SELECT word, direction, searched_at FROM history WHERE user = ?"
+                          " ORDER BY searched_at DESC LIMIT ? OFFSET ?",
+                          (_hash(user), -1 if limit is None else limit, offset))
+        return [{"word": word, "direction": direction,
+                 "timestamp": datetime.fromtimestamp(searched_at).isoformat()}
+                for word, direction, searched_at in rows]
+
+    # --- Favorites ---
+
+    def add_favorite(self, user, word, translation, direction):
+        """Bookmark a translation. Returns: False if it already was one"""
+        user = _hash(user)
+        key = favorite_key(word, translation, direction)
+        keys = self._keys(user)
+        with self._lock:
+            if key in keys.favorites:
+                return False
+            keys.favorites.add(key)
+        self._write(user, "INSERT OR REPLACE INTO favorites VALUES (?, ?, ?, ?, ?, ?)",
+                    (user, key, word, translation, direction, time.time()))
+        return True
+
+    def remove_favorite(self, user, word, translation, direction):
+        user = _hash(user)
+        key = favorite_key(word, translation, direction)
+        keys = self._keys(user)
+        with self._lock:
+            keys.favorites.discard(key)
+        self._write(user, "DELETE FROM favorites WHERE user = ? AND key = ?", (user, key))
+
+    def clear_favorites(self, user):
+        user = _hash(user)
+        keys = self._keys(user)
+        with self._lock:
+            keys.favorites.clear()
+        self._write(user, "DELETE FROM favorites WHERE user = ?", (user,))
+
+    def is_favorite(self, user, word, translation, direction):
+        return favorite_key(word, translation, direction) in self._keys(_hash(user)).favorites
+
+    def favorite_count(self, user):
+        return len(self._keys(_hash(user)).favorites)
+
+    def favorites(self, user, offset=0, limit=PAGE_SIZE):
+        """
+        One page of favorites, in the order they were added; ``limit`` None reads them all.
+        Returns: [{"word", "translation", "direction", "timestamp"}, ...]
+        """
+        rows = self._read("SELECT word, translation, direction, added_at FROM favorites"
+                          " WHERE user = ? ORDER BY added_at LIMIT ? OFFSET ?",
+                          (_hash(user), -1 if limit is None else limit, offset))
+        return [{"word": word, "translation": translation, "direction": direction,
+                 "timestamp": datetime.fromtimestamp(added_at).isoformat()}
+                for word, translation, direction, added_at in rows]
+
+    # --- Writing ---
+
+    def flush(self):
+        """Wait until every queued write is on disk."""
+        self._writes.join()
+
+    def _write(self, user, statement, params):
+        with self._lock:
+            self._pending[user] = self._pending.get(user, 0) + 1
+        self._writes.put((user, statement, params))
+
+    def _write_loop(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA synchronous = NORMAL")
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with db:
+                    for _, statement, params in batch:
+                        db.execute(statement, params)
+            except sqlite3.Error:
+                # The in-memory keys stay right for this process; the rows
+                # are lost, which is no reason to stop the writer
+                log.exception("%d user store writes failed", len(batch))
+            finally:
+                with self._lock:
+                    for user, _, _ in batch:
+                        left = self._pending[user] - 1
+                        if left:
+                            self._pending[user] = left
+                        else:
+                            del self._pending[user]
+                for _ in batch:
+                    self._writes.task_done()
+
+    # --- Reading ---
+
+    def _connect(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode = WAL")  # readers never block the writer
+        return db
+
+    def _read(self, sql, params):
+        """Rows of a query whose first parameter is the user hash."""
+        with self._lock:
+            pending = params[0] in self._pending
+        if pending:
+            self.flush()  # this user's own changes show up on the page
+        return self._connect().execute(sql, params).fetchall()
+
+    def _keys(self, user):
+        """
+        The user's keys, loaded on first use. Change them with the lock held.
+        Loading reads SQLite without the lock, so other sessions never wait
+        for it; only a user evicted with writes still queued waits for those.
+        """
+        with self._lock:
+            keys = self._users.get(user)
+            if keys is not None:
+                self._users.move_to_end(user)
+                return keys
+            pending = user in self._pending
+        if pending:
+            self.flush()
+        db = self._connect()
+        history = [key for key, in db.execute(
+            "SELECT key FROM history WHERE user = ? ORDER BY searched_at", (user,))]
+        favorites = [key for key, in db.execute(
+            "SELECT key FROM favorites WHERE user = ?", (user,))]
+        with self._lock:
+            # Another session may have loaded the same user meanwhile
+            keys = self._users.setdefault(user, _UserKeys(history, favorites))
+            self._users.move_to_end(user)
+            if len(self._users) > CACHED_USERS:
+                self._users.popitem(last=False)
+            return keys